@@ -0,0 +1,79 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Helpers shared by the benchmark scripts."""
+
+import statistics
+import time
+import types
+import uuid
+from contextlib import contextmanager
+
+
+def summarize(samples: list[float]) -> dict:
+    """
+    Summarizes latency samples given in seconds.
+
+    Args:
+        samples: The measured latencies.
+
+    Returns:
+        A dictionary with the count and the mean, p50, p95 and p99 in ms.
+    """
+    if not samples:
+        return {"n": 0}
+    ordered = sorted(samples)
+
+    def pct(p: float) -> float:
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000
+
+    return {
+        "n": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "p50_ms": round(pct(0.50), 3),
+        "p95_ms": round(pct(0.95), 3),
+        "p99_ms": round(pct(0.99), 3),
+    }
+
+
+def print_table(rows: list[dict]) -> None:
+    """Prints a list of flat dictionaries as an aligned text table."""
+    if not rows:
+        return
+    columns = list(dict.fromkeys(k for row in rows for k in row))
+    widths = {
+        c: max(len(c), *(len(str(row.get(c, ""))) for row in rows)) for c in columns
+    }
+    print("  ".join(c.ljust(widths[c]) for c in columns))
+    for row in rows:
+        print("  ".join(str(row.get(c, "")).ljust(widths[c]) for c in columns))
+
+
+@contextmanager
+def timed(samples: list[float]):
+    """Appends the wall-clock duration of the block to `samples`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        samples.append(time.perf_counter() - start)
+
+
+class FakeToolContext:
+    """The part of `ToolContext` the tools use, for calling them directly."""
+
+    def __init__(self):
+        self.state = {}
+        self.session = types.SimpleNamespace(id=str(uuid.uuid4()))
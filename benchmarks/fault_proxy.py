@@ -0,0 +1,150 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""A TCP proxy that injects latency, resets and hangs in front of a database.
+
+Run standalone to exercise the agent by hand:
+
+    python -m benchmarks.fault_proxy --upstream localhost:5432 --port 6432 \\
+        --latency-ms 200 --reset-rate 0.05
+
+or use `FaultProxy` from another benchmark to switch faults at run time.
+"""
+
+import argparse
+import asyncio
+import random
+import threading
+
+
+class FaultProxy:
+    """
+    Forwards TCP connections to `upstream`, injecting faults on the way.
+
+    Attributes can be changed while the proxy runs:
+        latency: Seconds added before forwarding each chunk.
+        connect_delay: Seconds added before connecting upstream, standing in
+            for a TLS handshake or a connector's certificate fetch.
+        reset_rate: Probability that a chunk aborts the connection instead.
+        blackhole: Whether chunks are silently swallowed, so peers hang.
+        refuse: Whether new connections are closed immediately.
+    """
+
+    def __init__(self, upstream_host: str, upstream_port: int, port: int = 0):
+        self.upstream_host = upstream_host
+        self.upstream_port = upstream_port
+        self.port = port
+        self.latency = 0.0
+        self.connect_delay = 0.0
+        self.reset_rate = 0.0
+        self.blackhole = False
+        self.refuse = False
+        self._loop = None
+        self._server = None
+        self._writers = set()
+
+    async def _pipe(self, reader, writer, peer):
+        try:
+            while data := await reader.read(65536):
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                if self.blackhole:
+                    continue
+                if self.reset_rate and random.random() < self.reset_rate:
+                    writer.transport.abort()
+                    peer.transport.abort()
+                    return
+                writer.write(data)
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def _handle(self, client_reader, client_writer):
+        if self.refuse:
+            client_writer.transport.abort()
+            return
+        if self.connect_delay:
+            await asyncio.sleep(self.connect_delay)
+        try:
+            server_reader, server_writer = await asyncio.open_connection(
+                self.upstream_host, self.upstream_port
+            )
+        except OSError:
+            client_writer.transport.abort()
+            return
+        self._writers.update((client_writer, server_writer))
+        await asyncio.gather(
+            self._pipe(client_reader, server_writer, client_writer),
+            self._pipe(server_reader, client_writer, server_writer),
+        )
+        self._writers.difference_update((client_writer, server_writer))
+
+    async def serve(self):
+        self._loop = asyncio.get_running_loop()
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        async with self._server:
+            await self._server.serve_forever()
+
+    def start(self) -> "FaultProxy":
+        """Runs the proxy on a daemon thread and returns once it listens."""
+        started = threading.Event()
+
+        def run():
+            async def main():
+                task = asyncio.ensure_future(self.serve())
+                while self._server is None or not self._server.is_serving():
+                    await asyncio.sleep(0.01)
+                started.set()
+                await task
+
+            asyncio.run(main())
+
+        threading.Thread(target=run, daemon=True, name="fault-proxy").start()
+        started.wait()
+        return self
+
+    def reset_connections(self):
+        """Aborts every open connection, like a database restart would."""
+
+        def abort():
+            for writer in list(self._writers):
+                writer.transport.abort()
+
+        self._loop.call_soon_threadsafe(abort)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--upstream", default="localhost:5432")
+    parser.add_argument("--port", type=int, default=6432)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--reset-rate", type=float, default=0)
+    parser.add_argument("--blackhole", action="store_true")
+    args = parser.parse_args()
+
+    host, port = args.upstream.rsplit(":", 1)
+    proxy = FaultProxy(host, int(port), args.port)
+    proxy.latency = args.latency_ms / 1000
+    proxy.reset_rate = args.reset_rate
+    proxy.blackhole = args.blackhole
+    print(f"Proxying 127.0.0.1:{args.port} -> {args.upstream}")
+    asyncio.run(proxy.serve())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Compares token counts and answer quality of verbose and compact tool results.
+
+Usage:
+    python -m benchmarks.result_encoding
+    python -m benchmarks.result_encoding --count-tokens --model gemini-2.5-pro
+
+Without flags token counts are estimated locally. `--count-tokens` asks the
+model's tokenizer instead, and `--model` also asks the model questions about
+each encoding and scores its answers against the known data.
+"""
+
+import argparse
+import json
+import random
+from collections import namedtuple
+
+from google.genai import types
+
+from benchmarks.common import print_table
+from personal_assistant import compaction
+from personal_assistant.sub_agents.checkmate import tools as checkmate_tools
+from personal_assistant.sub_agents.stash import tools as stash_tools
+
+StashedUrl = namedtuple("StashedUrl", "url_id url summary tags")
+
+WORDS = (
+    "buy milk eggs bread call plumber book flights renew passport pay rent "
+    "water plants clean garage email landlord pick up laundry schedule dentist "
+    "review budget update resume prepare slides fix bike walk dog"
+).split()
+TAGS = "python ai databases cooking travel finance health design news music".split()
+
+
+def make_todo_lists(rng: random.Random, lists: int, tasks: int) -> list:
+    result = []
+    for n in range(lists):
+        result.append(
+            (
+                f"{n:08x}-1111-4000-8000-000000000000",
+                f"list {n} " + rng.choice(WORDS),
+                [
+                    (
+                        f"{n:08x}-{i:04x}-4000-8000-000000000000",
+                        " ".join(rng.choices(WORDS, k=4)) + f" #{n}.{i}",
+                        rng.random() < 0.6,
+                    )
+                    for i in range(tasks)
+                ],
+            )
+        )
+    return result
+
+
+def make_stashed_urls(rng: random.Random, count: int) -> list:
+    return [
+        StashedUrl(
+            url_id=f"{n:08x}-0000-4000-8000-000000000000",
+            url=f"https://example.com/articles/{n}/{rng.choice(WORDS)}",
+            summary=" ".join(rng.choices(WORDS, k=rng.randint(20, 120))),
+            tags=",".join(rng.sample(TAGS, 3)) + f",topic{n}",
+        )
+        for n in range(count)
+    ]
+
+
+def todo_questions(rng: random.Random, lists: list) -> list[tuple[str, str]]:
+    questions = []
+    for _, list_name, tasks in rng.sample(lists, min(3, len(lists))):
+        open_tasks = [d for _, d, c in tasks if not c]
+        questions.append(
+            (
+                f"How many open (not completed) tasks are in the list '{list_name}'? "
+                "Answer with a number only.",
+                str(len(open_tasks)),
+            )
+        )
+        if open_tasks:
+            questions.append(
+                (
+                    f"Which list contains the open task '{rng.choice(open_tasks)}'? "
+                    "Answer with the list name only.",
+                    list_name,
+                )
+            )
+    return questions
+
+
+def stash_questions(rng: random.Random, urls: list) -> list[tuple[str, str]]:
+    return [
+        (
+            f"Which URL is tagged 'topic{n}'? Answer with the URL only.",
+            urls[n].url,
+        )
+        for n in rng.sample(range(len(urls)), min(5, len(urls)))
+    ]
+
+
+def count_tokens(payload: dict, client, model: str) -> int:
+    text = json.dumps(payload)
+    if client is None:
+        return compaction.estimate_tokens(
+            [types.Content(role="user", parts=[types.Part(text=text)])]
+        )
+    return client.models.count_tokens(model=model, contents=text).total_tokens
+
+
+def score(payload: dict, questions: list, client, model: str) -> float:
+    correct = 0
+    for question, expected in questions:
+        response = client.models.generate_content(
+            model=model,
+            contents=(
+                "Here is the result of a tool call:\n"
+                + json.dumps(payload)
+                + "\n\n"
+                + question
+            ),
+        )
+        answer = (response.text or "").strip().strip(".'\"`")
+        correct += answer.lower() == expected.lower()
+    return round(correct / len(questions), 3) if questions else 1.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--sizes", default="10,100,1000", help="Tasks/URLs per case.")
+    parser.add_argument("--count-tokens", action="store_true")
+    parser.add_argument("--model", default=None, help="Model used to score answers.")
+    args = parser.parse_args()
+
+    client = None
+    if args.count_tokens or args.model:
+        from google import genai
+
+        client = genai.Client()
+    token_model = args.model or "gemini-2.5-pro"
+
+    rows = []
+    for size in (int(s) for s in args.sizes.split(",")):
+        rng = random.Random(args.seed + size)
+        lists = make_todo_lists(rng, lists=max(1, size // 50), tasks=min(size, 50))
+        urls = make_stashed_urls(rng, size)
+        cases = {
+            "get_todo_list": (
+                {
+                    "verbose": checkmate_tools.format_todo_lists(lists, False, True),
+                    "compact": checkmate_tools.format_todo_lists(lists, True, False),
+                    "compact_all": checkmate_tools.format_todo_lists(lists, True, True),
+                },
+                todo_questions(rng, lists),
+            ),
+            "get_stashed_urls": (
+                {
+                    "verbose": stash_tools.format_stashed_urls(urls, False),
+                    "compact": stash_tools.format_stashed_urls(urls, True),
+                },
+                stash_questions(rng, urls),
+            ),
+        }
+        for tool, (payloads, questions) in cases.items():
+            baseline = None
+            for fmt, payload in payloads.items():
+                tokens = count_tokens(
+                    payload, client if args.count_tokens else None, token_model
+                )
+                baseline = baseline or tokens
+                row = {
+                    "tool": tool,
+                    "size": size,
+                    "format": fmt,
+                    "tokens": tokens,
+                    "vs_verbose": f"{tokens / baseline:.0%}",
+                }
+                if args.model:
+                    row["accuracy"] = score(payload, questions, client, args.model)
+                rows.append(row)
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Compares append and load latency of the SQL and in-memory session services.
+
+Usage:
+    python -m benchmarks.session_service --db-url sqlite:///bench_sessions.db
+"""
+
+import argparse
+import asyncio
+
+from google.adk.events import Event, EventActions
+from google.adk.sessions import BaseSessionService, InMemorySessionService
+from google.genai import types
+
+from benchmarks.common import print_table, summarize, timed
+from personal_assistant import database
+from personal_assistant.session_service import SqlSessionService
+
+APP_NAME = "personal_assistant_bench"
+
+
+def _event(turn: int, i: int) -> Event:
+    author = "user" if i % 2 == 0 else "Checkmate"
+    return Event(
+        author=author,
+        content=types.Content(
+            role="user" if author == "user" else "model",
+            parts=[types.Part(text=f"turn {turn} message {i} " + "x" * 200)],
+        ),
+        actions=EventActions(
+            state_delta={"list_name": f"list-{turn}", "user:user_name": "bench"}
+        ),
+    )
+
+
+async def _run(
+    name: str,
+    service: BaseSessionService,
+    sessions: int,
+    turns: int,
+    events_per_turn: int,
+) -> list[dict]:
+    append, load = [], []
+    session_ids = []
+    for n in range(sessions):
+        session = await service.create_session(app_name=APP_NAME, user_id=f"user-{n}")
+        session_ids.append((session.user_id, session.id))
+    for turn in range(turns):
+        for user_id, session_id in session_ids:
+            with timed(load):
+                session = await service.get_session(
+                    app_name=APP_NAME, user_id=user_id, session_id=session_id
+                )
+            for i in range(events_per_turn):
+                with timed(append):
+                    await service.append_event(session, _event(turn, i))
+    if isinstance(service, SqlSessionService):
+        await service.close()
+    return [
+        {"service": name, "op": "append_event", **summarize(append)},
+        {"service": name, "op": "get_session", **summarize(load)},
+    ]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db-url", default="sqlite:///bench_sessions.db")
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=10)
+    parser.add_argument("--events-per-turn", type=int, default=4)
+    args = parser.parse_args()
+
+    engine = database.connect_with_url(args.db_url)
+    database.create_tables(engine)
+    services = {
+        "in_memory": InMemorySessionService(),
+        "sql_cached": SqlSessionService(engine),
+        "sql_uncached": SqlSessionService(engine, cache_size=0),
+        "sql_unbatched": SqlSessionService(engine, max_batch_events=1),
+    }
+    rows = []
+    for name, service in services.items():
+        rows.extend(
+            await _run(name, service, args.sessions, args.turns, args.events_per_turn)
+        )
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
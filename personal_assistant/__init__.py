@@ -17,12 +17,18 @@
 import os
 
 import google.auth
+import google.auth.exceptions
 from dotenv import load_dotenv
 
 load_dotenv()
 
-_, project_id = google.auth.default()
-os.environ.setdefault("GOOGLE_CLOUD_PROJECT", project_id)
+try:
+    _, project_id = google.auth.default()
+except google.auth.exceptions.DefaultCredentialsError:
+    # Running locally, e.g. with an API key or the fake model.
+    project_id = None
+if project_id:
+    os.environ.setdefault("GOOGLE_CLOUD_PROJECT", project_id)
 os.environ.setdefault("GOOGLE_CLOUD_LOCATION", "global")
 os.environ.setdefault("GOOGLE_GENAI_USE_VERTEXAI", "False")
 
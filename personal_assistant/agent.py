@@ -17,6 +17,8 @@
 from google.adk.agents import LlmAgent
 from google.adk.tools.agent_tool import AgentTool
 
+from . import compaction
+from . import fake_model
 from . import prompt
 from . import tools
 from .sub_agents.checkmate.agent import checkmate_agent
@@ -27,7 +29,7 @@ MODEL = "gemini-2.5-pro"
 
 personal_assistant_agent = LlmAgent(
     name="personal_assistant_agent",
-    model=MODEL,
+    model=fake_model.resolve(MODEL),
     description=(
         "A personal assistant that can help with various tasks."
     ),
@@ -37,7 +39,8 @@ personal_assistant_agent = LlmAgent(
         #AgentTool(agent=checkmate_agent),
         #AgentTool(agent=stash_agent),
     ],
-    sub_agents=[checkmate_agent, stash_agent]
+    sub_agents=[checkmate_agent, stash_agent],
+    before_model_callback=compaction.compact_history,
 )
 
 root_agent = personal_assistant_agent
@@ -0,0 +1,276 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Moves completed tasks and stale stashed URLs to archive tables.
+
+Archival runs in small batches, each its own transaction, so it never holds
+locks for long and can run next to the agents. Run it from a scheduler, or
+keep it running with `--interval`:
+
+    python -m personal_assistant.archival --interval 3600
+
+Archived rows stay readable through the tools' `include_archived` flag.
+"""
+
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+
+import sqlalchemy
+
+from personal_assistant import database, single_flight
+
+logger = logging.getLogger(__name__)
+
+# Completed tasks older than this are archived.
+TASK_ARCHIVE_DAYS = float(os.environ.get("ARCHIVE_COMPLETED_TASKS_DAYS", "30"))
+# Stashed URLs not updated for this long are archived; unset keeps them all.
+_stash_days = os.environ.get("ARCHIVE_STASH_DAYS")
+STASH_ARCHIVE_DAYS = float(_stash_days) if _stash_days else None
+BATCH_SIZE = int(os.environ.get("ARCHIVE_BATCH_SIZE", "1000"))
+# Pause between batches, leaving room for the agents' queries.
+BATCH_PAUSE_SECONDS = float(os.environ.get("ARCHIVE_BATCH_PAUSE_SECONDS", "0.1"))
+# Runs archival in the agent process this often when set.
+INTERVAL_SECONDS = os.environ.get("ARCHIVE_INTERVAL_SECONDS")
+
+
+def _move_batches(
+    engine: sqlalchemy.engine.base.Engine,
+    table: sqlalchemy.Table,
+    archive: sqlalchemy.Table,
+    due,
+    batch_size: int,
+    owner: sqlalchemy.Column,
+    extra_columns: dict | None = None,
+    join: sqlalchemy.Table | None = None,
+    tombstone_kind: str | None = None,
+) -> int:
+    """
+    Moves the rows of `table` matching `due` to `archive`, a batch at a time.
+
+    Args:
+        engine: The primary engine.
+        table: The hot table.
+        archive: Its archive table.
+        due: The filter selecting the rows to archive.
+        batch_size: Rows moved per transaction.
+        owner: The column holding the ID of the user each row belongs to.
+        extra_columns: Archive columns filled from other expressions, by name.
+        join: A table joined to `table` for `due`, `owner` and `extra_columns`.
+        tombstone_kind: For rows that are part of the users' to-do versions,
+            the kind they are recorded under in `todo_tombstones`. The owners
+            are then locked first, as the tools do, and their versions bumped.
+
+    Returns:
+        The number of rows moved.
+    """
+    extra_columns = extra_columns or {}
+    key = table.primary_key.columns[0]
+    source = table.join(join) if join is not None else table
+    moved = 0
+    while True:
+        with engine.begin() as conn:
+            batch_due = due
+            if tombstone_kind is not None:
+                candidates = (
+                    sqlalchemy.select(owner)
+                    .select_from(source)
+                    .where(due)
+                    .distinct()
+                    .limit(batch_size)
+                )
+                # Skips users a tool is changing, like the rows below.
+                owners = conn.execute(
+                    sqlalchemy.select(database.users.c.user_id)
+                    .where(database.users.c.user_id.in_(candidates))
+                    .order_by(database.users.c.user_id)
+                    .with_for_update(skip_locked=True)
+                ).scalars().all()
+                batch_due = sqlalchemy.and_(due, owner.in_(owners))
+            # Skips rows locked by a concurrent run or a tool's transaction.
+            rows = conn.execute(
+                sqlalchemy.select(key, owner)
+                .select_from(source)
+                .where(batch_due)
+                .limit(batch_size)
+                .with_for_update(of=table, skip_locked=True)
+            ).all()
+            if not rows:
+                return moved
+            ids = [row[0] for row in rows]
+            columns = [c.name for c in table.columns] + list(extra_columns)
+            conn.execute(
+                archive.insert().from_select(
+                    columns + ["archived_at"],
+                    sqlalchemy.select(
+                        *table.columns,
+                        *extra_columns.values(),
+                        sqlalchemy.literal(time.time(), sqlalchemy.Float),
+                    )
+                    .select_from(source)
+                    .where(key.in_(ids)),
+                )
+            )
+            for user_id in sorted({row[1] for row in rows}):
+                single_flight.mark_changed(user_id)
+                if tombstone_kind is not None:
+                    _record_archived(
+                        conn, source, key, owner, ids, user_id, tombstone_kind
+                    )
+            conn.execute(sqlalchemy.delete(table).where(key.in_(ids)))
+        # Reads in flight may have seen the rows before they moved.
+        single_flight.invalidate_changed()
+        moved += len(ids)
+        if len(ids) < batch_size:
+            return moved
+        time.sleep(BATCH_PAUSE_SECONDS)
+
+
+def _record_archived(
+    conn: sqlalchemy.engine.base.Connection,
+    source,
+    key: sqlalchemy.Column,
+    owner: sqlalchemy.Column,
+    ids: list,
+    user_id: str,
+    kind: str,
+):
+    """Bumps a user's to-do version and records their archived rows as removed."""
+    version = database.bump_todo_version(conn, user_id=user_id)
+    conn.execute(
+        database.todo_tombstones.insert().from_select(
+            ["item_id", "user_id", "kind", "list_id", "version"],
+            sqlalchemy.select(
+                key,
+                owner,
+                sqlalchemy.literal(kind),
+                database.tasks.c.list_id,
+                sqlalchemy.literal(version),
+            )
+            .select_from(source)
+            .where(key.in_(ids), owner == user_id),
+        )
+    )
+
+
+def archive_completed_tasks(
+    engine: sqlalchemy.engine.base.Engine,
+    older_than_days: float = TASK_ARCHIVE_DAYS,
+    batch_size: int = BATCH_SIZE,
+) -> int:
+    """
+    Archives tasks completed more than `older_than_days` ago.
+
+    Completed tasks without a completion time, e.g. completed by an older
+    version during a rollout, are kept until a migration fills it in.
+    Archived tasks are reported by `get_todo_changes` as removed, with the
+    kind "archived_task".
+
+    Returns:
+        The number of tasks archived.
+    """
+    cutoff = time.time() - older_than_days * 86400
+    return _move_batches(
+        engine,
+        database.tasks,
+        database.tasks_archive,
+        sqlalchemy.and_(
+            database.tasks.c.is_completed, database.tasks.c.completed_at < cutoff
+        ),
+        batch_size,
+        owner=database.todolists.c.user_id,
+        extra_columns={"user_id": database.todolists.c.user_id},
+        join=database.todolists,
+        tombstone_kind="archived_task",
+    )
+
+
+def archive_stale_urls(
+    engine: sqlalchemy.engine.base.Engine,
+    older_than_days: float,
+    batch_size: int = BATCH_SIZE,
+) -> int:
+    """
+    Archives stashed URLs not stashed or updated for `older_than_days`.
+
+    URLs without an update time, e.g. stashed by an older version during a
+    rollout, are kept until a migration fills it in.
+
+    Returns:
+        The number of URLs archived.
+    """
+    cutoff = time.time() - older_than_days * 86400
+    return _move_batches(
+        engine,
+        database.stashed_urls,
+        database.stashed_urls_archive,
+        database.stashed_urls.c.updated_at < cutoff,
+        batch_size,
+        owner=database.stashed_urls.c.user_id,
+    )
+
+
+def run_archival(engine: sqlalchemy.engine.base.Engine | None = None) -> dict:
+    """
+    Runs every configured archival job once.
+
+    Returns:
+        The number of rows archived by each job.
+    """
+    engine = engine or database.get_engine()
+    start = time.perf_counter()
+    result = {"tasks": archive_completed_tasks(engine)}
+    if STASH_ARCHIVE_DAYS is not None:
+        result["stashed_urls"] = archive_stale_urls(engine, STASH_ARCHIVE_DAYS)
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    logger.info("Archival finished: %s", result)
+    return result
+
+
+def start_background() -> None:
+    """Runs archival every `ARCHIVE_INTERVAL_SECONDS` on a daemon thread, if set."""
+    if not INTERVAL_SECONDS:
+        return
+
+    def run():
+        while True:
+            try:
+                run_archival()
+            except Exception:
+                logger.exception("Archival failed.")
+            time.sleep(float(INTERVAL_SECONDS))
+
+    threading.Thread(target=run, name="archival", daemon=True).start()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--interval", type=float, help="Keep running, every this many seconds."
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    while True:
+        print(json.dumps(run_archival()))
+        if not args.interval:
+            return
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Conversation history compaction to bound the size of each model request."""
+
+import json
+import logging
+import os
+from typing import Any
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.genai import types
+
+logger = logging.getLogger(__name__)
+
+# Approximate prompt budget for the conversation history, in tokens.
+HISTORY_TOKEN_BUDGET = int(os.environ.get("HISTORY_TOKEN_BUDGET", "8000"))
+# Number of most recent user turns that are always sent verbatim.
+KEEP_RECENT_TURNS = int(os.environ.get("HISTORY_KEEP_RECENT_TURNS", "4"))
+# Maximum size of the running summary, in characters.
+SUMMARY_MAX_CHARS = 4000
+
+# Keys whose values must survive compaction because later tool calls need them.
+IDENTIFIER_KEYS = ("user_id", "list_id", "task_id", "url_id")
+# Scalar keys kept as-is when a tool response is collapsed.
+KEPT_SCALAR_KEYS = IDENTIFIER_KEYS + ("status", "message", "list_name", "url")
+
+# Running summaries, keyed by agent name.
+SUMMARY_STATE_KEY = "history_summary"
+STATS_STATE_KEY = "temp:history_compaction"
+
+_SUMMARY_HEADER = "[Summary of the earlier conversation]"
+
+
+def estimate_tokens(contents: list[types.Content]) -> int:
+    """
+    Estimates the number of prompt tokens used by a list of contents.
+
+    Uses the common approximation of four characters per token, which is close
+    enough to decide when to compact without a round trip to the model.
+
+    Args:
+        contents: The contents of a model request.
+
+    Returns:
+        The estimated token count.
+    """
+    chars = 0
+    for content in contents:
+        for part in content.parts or []:
+            if part.text:
+                chars += len(part.text)
+            if part.function_call:
+                chars += len(part.function_call.name or "")
+                chars += len(json.dumps(part.function_call.args or {}, default=str))
+            if part.function_response:
+                chars += len(part.function_response.name or "")
+                chars += len(
+                    json.dumps(part.function_response.response or {}, default=str)
+                )
+    return chars // 4
+
+
+def _collect_identifiers(value: Any, found: dict[str, list[str]]) -> None:
+    """Collects the values of `IDENTIFIER_KEYS` found anywhere in `value`."""
+    if isinstance(value, dict):
+        for k, v in value.items():
+            if k in IDENTIFIER_KEYS and isinstance(v, str):
+                v = [v]
+            elif not (k[:-1] in IDENTIFIER_KEYS and isinstance(v, list)):
+                _collect_identifiers(v, found)
+                continue
+            # A single identifier, or a list hoisted by `collapse_tool_response`.
+            key = k if k in IDENTIFIER_KEYS else k[:-1]
+            for item in v:
+                if isinstance(item, str) and item not in found.setdefault(key, []):
+                    found[key].append(item)
+    elif isinstance(value, list):
+        for item in value:
+            _collect_identifiers(item, found)
+
+
+def collapse_tool_response(response: dict) -> dict:
+    """
+    Replaces a bulky tool response with a short stub.
+
+    Scalars the agents rely on (identifiers, status, names) are kept, nested
+    identifiers are hoisted to the top level and collections are replaced by
+    their size.
+
+    Args:
+        response: The `function_response.response` dictionary.
+
+    Returns:
+        The collapsed response.
+    """
+    if response.get("compacted"):
+        return response
+    collapsed: dict[str, Any] = {"compacted": True}
+    for key, value in response.items():
+        if key in KEPT_SCALAR_KEYS and not isinstance(value, (dict, list)):
+            collapsed[key] = value
+        elif isinstance(value, list):
+            collapsed[key] = f"{len(value)} items omitted"
+        elif isinstance(value, dict):
+            collapsed[key] = f"{len(value)} fields omitted"
+    nested: dict[str, list[str]] = {}
+    _collect_identifiers(
+        {k: v for k, v in response.items() if isinstance(v, (dict, list))}, nested
+    )
+    for key, values in nested.items():
+        collapsed.setdefault(key + "s", values)
+    return collapsed
+
+
+def _is_user_message(content: types.Content) -> bool:
+    return content.role == "user" and any(p.text for p in content.parts or [])
+
+
+def _split_turns(contents: list[types.Content]) -> list[list[types.Content]]:
+    """Splits contents into turns, each starting with a user text message."""
+    turns: list[list[types.Content]] = []
+    for content in contents:
+        if not turns or _is_user_message(content):
+            turns.append([])
+        turns[-1].append(content)
+    return turns
+
+
+def _summarize_turn(turn: list[types.Content]) -> list[str]:
+    """Renders one turn as short summary lines, keeping identifiers verbatim."""
+    lines = []
+    for content in turn:
+        for part in content.parts or []:
+            if part.text and not part.thought:
+                text = " ".join(part.text.split())
+                if len(text) > 200:
+                    text = text[:200] + "..."
+                lines.append(f"{content.role}: {text}")
+            elif part.function_call:
+                args = ", ".join(
+                    f"{k}={v!r}" for k, v in (part.function_call.args or {}).items()
+                )
+                lines.append(f"called {part.function_call.name}({args})")
+            elif part.function_response:
+                response = collapse_tool_response(part.function_response.response or {})
+                response.pop("compacted", None)
+                lines.append(
+                    f"{part.function_response.name} returned "
+                    + json.dumps(response, default=str)
+                )
+    return lines
+
+
+def _summary_content(summary: str, identifiers: dict[str, list[str]]) -> types.Content:
+    text = _SUMMARY_HEADER + "\n" + summary
+    if identifiers:
+        text += "\nKnown identifiers: " + json.dumps(identifiers)
+    return types.Content(role="user", parts=[types.Part(text=text)])
+
+
+def compact_history(
+    callback_context: CallbackContext, llm_request: LlmRequest
+) -> LlmResponse | None:
+    """
+    Compacts the conversation history once it exceeds `HISTORY_TOKEN_BUDGET`.
+
+    Used as a `before_model_callback`. Compaction happens in two stages, each
+    applied only while the request is still over budget:
+
+    1. Tool responses outside the last `KEEP_RECENT_TURNS` turns are collapsed
+       with `collapse_tool_response`.
+    2. Those older turns are folded into a running summary kept in the session
+       state, so each turn only summarizes what newly fell out of the window.
+
+    Args:
+        callback_context: The callback context.
+        llm_request: The request about to be sent to the model.
+
+    Returns:
+        None, so the (possibly compacted) request is sent to the model.
+    """
+    before = estimate_tokens(llm_request.contents)
+    stats = {"tokens_before": before, "tokens_after": before, "tokens_saved": 0}
+    if before <= HISTORY_TOKEN_BUDGET:
+        callback_context.state[STATS_STATE_KEY] = stats
+        return None
+
+    turns = _split_turns(llm_request.contents)
+    old_turns = turns[:-KEEP_RECENT_TURNS] if KEEP_RECENT_TURNS else turns
+    recent_turns = turns[len(old_turns) :]
+
+    # Stage 1: collapse old tool responses in place.
+    for turn in old_turns:
+        for i, content in enumerate(turn):
+            if not any(p.function_response for p in content.parts or []):
+                continue
+            parts = []
+            for part in content.parts:
+                if part.function_response:
+                    part = part.model_copy(
+                        update={
+                            "function_response": part.function_response.model_copy(
+                                update={
+                                    "response": collapse_tool_response(
+                                        part.function_response.response or {}
+                                    )
+                                }
+                            )
+                        }
+                    )
+                parts.append(part)
+            turn[i] = content.model_copy(update={"parts": parts})
+    contents = [c for turn in turns for c in turn]
+
+    # Stage 2: roll old turns into the running summary. Each agent sees its
+    # own view of the history, so summaries are kept per agent.
+    if estimate_tokens(contents) > HISTORY_TOKEN_BUDGET and old_turns:
+        summaries = dict(callback_context.state.get(SUMMARY_STATE_KEY) or {})
+        record = summaries.get(callback_context.agent_name) or {}
+        if record.get("turns", 0) > len(old_turns):
+            record = {}
+        summarized = record.get("turns", 0)
+        summary = record.get("summary", "")
+        identifiers = {k: list(v) for k, v in record.get("ids", {}).items()}
+        if len(old_turns) > summarized:
+            lines = []
+            for turn in old_turns[summarized:]:
+                lines.extend(_summarize_turn(turn))
+                for content in turn:
+                    for part in content.parts or []:
+                        if part.function_call:
+                            _collect_identifiers(part.function_call.args, identifiers)
+                        if part.function_response:
+                            _collect_identifiers(
+                                part.function_response.response, identifiers
+                            )
+            summary = "\n".join(filter(None, [summary, *lines]))
+            if len(summary) > SUMMARY_MAX_CHARS:
+                # Identifiers are kept separately, so dropping old lines is safe.
+                summary = "..." + summary[-SUMMARY_MAX_CHARS:].split("\n", 1)[-1]
+            summaries[callback_context.agent_name] = {
+                "summary": summary,
+                "turns": len(old_turns),
+                "ids": identifiers,
+            }
+            callback_context.state[SUMMARY_STATE_KEY] = summaries
+        contents = [_summary_content(summary, identifiers)] + [
+            c for turn in recent_turns for c in turn
+        ]
+
+    llm_request.contents = contents
+    after = estimate_tokens(contents)
+    stats.update(tokens_after=after, tokens_saved=before - after)
+    callback_context.state[STATS_STATE_KEY] = stats
+    logger.info(
+        "History compaction for %s: %d -> %d tokens (saved %d).",
+        callback_context.agent_name,
+        before,
+        after,
+        before - after,
+    )
+    return None
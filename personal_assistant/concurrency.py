@@ -0,0 +1,147 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Runs the independent tool calls of one model response concurrently.
+
+ADK starts every function call of a model response as its own asyncio task,
+but a synchronous tool blocks the event loop, so the calls run one after
+another. `concurrent_tools` wraps the tools as coroutines that run on the
+`resilience` worker pool. A call waits only for the earlier calls of the same
+response it conflicts with:
+
+    * reads wait for earlier writes, and never hold up writes;
+    * writes wait for earlier writes to the same list, task, URL or user, and
+      writes to the whole database order against every write;
+    * inserts declared with `commutes=True`, such as adding tasks to the same
+      list, do not wait for each other.
+
+The scope of a write is declared on the tool with `writes`; undeclared tools
+are treated as writes to the whole database.
+"""
+
+import asyncio
+import functools
+import inspect
+
+READ = "read"
+WRITE = "write"
+INSERT = "insert"
+
+# In-flight calls by invocation: ADK runs a response's calls together and
+# awaits them all before the next model call of the same invocation.
+_in_flight = {}
+
+
+def reads(func):
+    """Declares a tool as read-only."""
+    func.call_scope = (READ, ())
+    return func
+
+
+def writes(*scope_args: str, commutes: bool = False):
+    """
+    Declares what a mutating tool writes to.
+
+    Args:
+        *scope_args: The arguments naming the rows written, such as
+            `"list_id"` or `"task_ids"`. Arguments naming the same kind of row
+            match each other, so `task_ids` and `task_id` conflict. With none,
+            the tool may write anything.
+        commutes: Whether the tool only inserts rows, so calls to it with the
+            same scope give the same result in any order.
+    """
+
+    def decorator(func):
+        func.call_scope = (INSERT if commutes else WRITE, scope_args)
+        return func
+
+    return decorator
+
+
+class _Call:
+    def __init__(self, kind: str, scope: frozenset):
+        self.kind = kind
+        # None for the whole database.
+        self.scope = scope
+        self.done = asyncio.get_running_loop().create_future()
+
+    def must_follow(self, earlier: "_Call") -> bool:
+        if earlier.kind == READ:
+            return False
+        if self.kind == READ:
+            return True
+        if self.kind == INSERT and earlier.kind == INSERT:
+            return False
+        return self.scope is None or earlier.scope is None or bool(
+            self.scope & earlier.scope
+        )
+
+
+def _scope(scope_args: tuple, arguments: dict):
+    """Returns the `(kind of row, ID)` pairs a call writes, or None for all."""
+    if not scope_args:
+        return None
+    keys = set()
+    for name in scope_args:
+        kind = name.removesuffix("s").removesuffix("_id").removesuffix("_name")
+        values = arguments.get(name)
+        if not isinstance(values, list):
+            values = [values]
+        keys.update((kind, value) for value in values)
+    return frozenset(keys)
+
+
+def concurrent_tool(func):
+    """
+    Wraps a tool as a coroutine that runs concurrently with independent calls.
+
+    Args:
+        func: A tool, optionally declared with `reads` or `writes`. Tools
+            decorated with `resilience.resilient` run on its worker pool;
+            others run inline.
+
+    Returns:
+        An async function with the signature of `func`.
+    """
+    kind, scope_args = getattr(func, "call_scope", (WRITE, ()))
+    signature = inspect.signature(func)
+    run = getattr(func, "run_async", None)
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        arguments = signature.bind_partial(*args, **kwargs).arguments
+        invocation_id = getattr(arguments.get("tool_context"), "invocation_id", None)
+        call = _Call(kind, None if kind == READ else _scope(scope_args, arguments))
+        calls = _in_flight.setdefault(invocation_id, [])
+        earlier = [c.done for c in calls if call.must_follow(c)]
+        calls.append(call)
+        try:
+            if earlier:
+                await asyncio.wait(earlier)
+            if run is not None:
+                return await run(*args, **kwargs)
+            return func(*args, **kwargs)
+        finally:
+            call.done.set_result(None)
+            calls.remove(call)
+            if not calls:
+                del _in_flight[invocation_id]
+
+    return wrapper
+
+
+def concurrent_tools(funcs: list) -> list:
+    """Wraps a list of tools with `concurrent_tool`."""
+    return [concurrent_tool(func) for func in funcs]
@@ -0,0 +1,64 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Compact encodings for tool results returned to the model."""
+
+import os
+from collections.abc import Iterable
+from typing import Any
+
+# Whether read tools return the compact format unless the model asks otherwise.
+COMPACT_RESULTS = os.environ.get("COMPACT_TOOL_RESULTS", "").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+# Summaries longer than this are truncated in compact results.
+SUMMARY_PREVIEW_CHARS = int(os.environ.get("COMPACT_SUMMARY_CHARS", "160"))
+
+
+def columnar(columns: list[str], records: Iterable[Iterable[Any]]) -> dict:
+    """
+    Encodes records as one key array plus value rows.
+
+    Repeating every key in every record dominates the size of large results;
+    sending the keys once keeps the result self-describing at a fraction of the
+    tokens.
+
+    Args:
+        columns: The names of the fields, in row order.
+        records: The rows, each with one value per column.
+
+    Returns:
+        A dictionary with `columns` and `rows`.
+    """
+    return {"columns": columns, "rows": [list(r) for r in records]}
+
+
+def truncate(text: str, limit: int = SUMMARY_PREVIEW_CHARS) -> tuple[str, bool]:
+    """
+    Shortens `text` to at most `limit` characters, ending on a word boundary.
+
+    Args:
+        text: The text to shorten.
+        limit: The maximum number of characters to keep.
+
+    Returns:
+        The possibly shortened text and whether it was truncated.
+    """
+    if text is None or len(text) <= limit:
+        return text, False
+    cut = text[:limit].rsplit(" ", 1)[0] or text[:limit]
+    return cut + "…", True
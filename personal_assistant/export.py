@@ -0,0 +1,330 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Streaming export and restore of a user's data.
+
+An export is a directory with one file per table, in JSON Lines or Parquet,
+and a `manifest.json`. Rows are streamed from a server-side cursor and
+written batch by batch, and restores insert batch by batch, so memory stays
+bounded by `batch_size` whatever the size of the account:
+
+    python -m personal_assistant.export export USER_ID exports/alice --format parquet
+    python -m personal_assistant.export restore exports/alice --replace
+
+Parquet needs the optional `pyarrow` package.
+"""
+
+import argparse
+import io
+import json
+import os
+import time
+
+import sqlalchemy
+
+from personal_assistant import database
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+FORMATS = ("jsonl", "parquet")
+MANIFEST = "manifest.json"
+BATCH_SIZE = 5000
+
+# Tables in the order they are restored, so foreign keys resolve.
+TABLES = (
+    database.users,
+    database.todolists,
+    database.tasks,
+    database.tasks_archive,
+    database.stashed_urls,
+    database.stashed_urls_archive,
+)
+
+
+def _user_rows(table: sqlalchemy.Table, user_id: str):
+    """Returns the query for a user's rows of `table`, in primary key order."""
+    if table is database.tasks:
+        where = table.c.list_id.in_(
+            sqlalchemy.select(database.todolists.c.list_id).where(
+                database.todolists.c.user_id == user_id
+            )
+        )
+    else:
+        where = table.c.user_id == user_id
+    return sqlalchemy.select(table).where(where).order_by(*table.primary_key)
+
+
+def _arrow_schema(table: sqlalchemy.Table):
+    types = {
+        sqlalchemy.String: pyarrow.string(),
+        sqlalchemy.Integer: pyarrow.int64(),
+        sqlalchemy.Boolean: pyarrow.bool_(),
+        sqlalchemy.Float: pyarrow.float64(),
+    }
+    return pyarrow.schema(
+        [
+            (c.name, next(t for k, t in types.items() if isinstance(c.type, k)))
+            for c in table.columns
+        ]
+    )
+
+
+def _require_pyarrow():
+    if pyarrow is None:
+        raise RuntimeError("The parquet format needs pyarrow: pip install pyarrow")
+
+
+class _JsonlWriter:
+    def __init__(self, path: str):
+        self._file = open(path, "w", encoding="utf-8")
+
+    def write(self, rows: list[dict]):
+        self._file.writelines(json.dumps(row) + "\n" for row in rows)
+
+    def close(self):
+        self._file.close()
+
+
+class _ParquetWriter:
+    def __init__(self, path: str, table: sqlalchemy.Table):
+        self._schema = _arrow_schema(table)
+        self._writer = pyarrow.parquet.ParquetWriter(path, self._schema)
+
+    def write(self, rows: list[dict]):
+        self._writer.write_batch(
+            pyarrow.RecordBatch.from_pylist(rows, schema=self._schema)
+        )
+
+    def close(self):
+        self._writer.close()
+
+
+def _read_jsonl(path: str, batch_size: int):
+    with open(path, encoding="utf-8") as f:
+        batch = []
+        for line in f:
+            batch.append(json.loads(line))
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+def _read_parquet(path: str, batch_size: int):
+    for batch in pyarrow.parquet.ParquetFile(path).iter_batches(batch_size):
+        yield batch.to_pylist()
+
+
+def _open_writer(fmt: str, path: str, table: sqlalchemy.Table):
+    if fmt == "parquet":
+        return _ParquetWriter(path, table)
+    return _JsonlWriter(path)
+
+
+_READERS = {"jsonl": _read_jsonl, "parquet": _read_parquet}
+
+
+def export_user(
+    engine: sqlalchemy.engine.base.Engine,
+    user_id: str,
+    out_dir: str,
+    fmt: str = "jsonl",
+    batch_size: int = BATCH_SIZE,
+) -> dict:
+    """
+    Exports a user's row, to-do lists, tasks and stashed URLs, including archived ones.
+
+    All tables are read in one repeatable-read transaction, so the export is a
+    consistent snapshot.
+
+    Args:
+        engine: The engine to read from.
+        user_id: The ID of the user.
+        out_dir: The directory to write, created if missing.
+        fmt: `"jsonl"` or `"parquet"`.
+        batch_size: Rows fetched from the cursor and written at a time.
+
+    Returns:
+        The manifest: the format, the row count of each table and the rows per
+        second.
+    """
+    if fmt == "parquet":
+        _require_pyarrow()
+    os.makedirs(out_dir, exist_ok=True)
+    counts = {}
+    start = time.perf_counter()
+    with engine.connect() as conn:
+        if engine.dialect.name == "postgresql":
+            conn = conn.execution_options(isolation_level="REPEATABLE READ")
+        for table in TABLES:
+            path = os.path.join(out_dir, f"{table.name}.{fmt}")
+            writer = _open_writer(fmt, path, table)
+            counts[table.name] = 0
+            try:
+                result = conn.execution_options(
+                    stream_results=True, yield_per=batch_size
+                ).execute(_user_rows(table, user_id))
+                for rows in result.mappings().partitions():
+                    writer.write([dict(row) for row in rows])
+                    counts[table.name] += len(rows)
+            finally:
+                writer.close()
+    elapsed = time.perf_counter() - start
+    manifest = {
+        "user_id": user_id,
+        "format": fmt,
+        "exported_at": time.time(),
+        "rows": counts,
+        "rows_per_second": round(sum(counts.values()) / elapsed) if elapsed else None,
+    }
+    with open(os.path.join(out_dir, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def _delete_user_rows(conn: sqlalchemy.engine.base.Connection, user_id: str):
+    """Deletes a user and everything the user owns, children first."""
+    for table in reversed(TABLES):
+        query = _user_rows(table, user_id)
+        conn.execute(sqlalchemy.delete(table).where(query.whereclause))
+    conn.execute(
+        sqlalchemy.delete(database.todo_tombstones).where(
+            database.todo_tombstones.c.user_id == user_id
+        )
+    )
+
+
+def _copy_value(value) -> str:
+    """Formats a value for the text format of Postgres `COPY`."""
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def insert_rows(
+    conn: sqlalchemy.engine.base.Connection, table: sqlalchemy.Table, rows: list[dict]
+):
+    """
+    Inserts a batch of rows.
+
+    On pg8000 the batch is sent with one `COPY`, which costs a single round
+    trip and no per-row statement; other drivers use executemany.
+
+    Args:
+        conn: The connection of the loading transaction.
+        table: The table to insert into.
+        rows: The rows, as dictionaries keyed by column name. Missing columns
+            are NULL.
+    """
+    if conn.dialect.driver != "pg8000":
+        conn.execute(table.insert(), rows)
+        return
+    columns = [c.name for c in table.columns]
+    data = "".join(
+        "\t".join(_copy_value(row.get(c)) for c in columns) + "\n" for row in rows
+    )
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(
+            f"COPY {table.name} ({', '.join(columns)}) FROM STDIN",
+            stream=io.BytesIO(data.encode()),
+        )
+    finally:
+        cursor.close()
+
+
+def restore_user(
+    engine: sqlalchemy.engine.base.Engine,
+    in_dir: str,
+    replace: bool = False,
+    batch_size: int = BATCH_SIZE,
+) -> dict:
+    """
+    Restores an export written by `export_user` in one transaction.
+
+    Args:
+        engine: The engine to write to.
+        in_dir: The export directory.
+        replace: Whether to delete the user's current data first. Otherwise
+            the restore fails if any restored row already exists.
+        batch_size: Rows read and inserted at a time.
+
+    Returns:
+        The row count of each table and the rows per second.
+    """
+    with open(os.path.join(in_dir, MANIFEST), encoding="utf-8") as f:
+        manifest = json.load(f)
+    fmt = manifest["format"]
+    if fmt == "parquet":
+        _require_pyarrow()
+    counts = {}
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        if replace:
+            _delete_user_rows(conn, manifest["user_id"])
+        for table in TABLES:
+            counts[table.name] = 0
+            path = os.path.join(in_dir, f"{table.name}.{fmt}")
+            for rows in _READERS[fmt](path, batch_size):
+                insert_rows(conn, table, rows)
+                counts[table.name] += len(rows)
+    elapsed = time.perf_counter() - start
+    return {
+        "rows": counts,
+        "rows_per_second": round(sum(counts.values()) / elapsed) if elapsed else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export", help="Export a user's data.")
+    export.add_argument("user_id")
+    export.add_argument("out_dir")
+    export.add_argument("--format", choices=FORMATS, default="jsonl")
+    restore = commands.add_parser("restore", help="Restore an export.")
+    restore.add_argument("in_dir")
+    restore.add_argument(
+        "--replace", action="store_true", help="Replace the user's current data."
+    )
+    for command in (export, restore):
+        command.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    engine = database.get_engine()
+    if args.command == "export":
+        result = export_user(
+            engine, args.user_id, args.out_dir, args.format, args.batch_size
+        )
+    else:
+        result = restore_user(engine, args.in_dir, args.replace, args.batch_size)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
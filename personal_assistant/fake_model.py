@@ -0,0 +1,184 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""A scripted stand-in for Gemini for running the assistant fully locally."""
+
+import asyncio
+import collections
+import contextlib
+import contextvars
+import json
+import os
+import re
+from collections.abc import AsyncGenerator, Callable
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+# Agents use the fake model instead of Gemini when set.
+ENABLED = os.environ.get("FAKE_MODEL", "").lower() in ("1", "true", "yes")
+# Simulated time the model takes per response.
+LATENCY_SECONDS = float(os.environ.get("FAKE_MODEL_LATENCY_MS", "0")) / 1000
+
+# `/tool {"arg": 1}` or `/Agent.tool {"arg": 1}`, one call per line.
+_DIRECTIVE = re.compile(r"^/(?:(?P<agent>[\w-]+)\.)?(?P<tool>\w+)\s*(?P<args>\{.*\})?\s*$")
+_CONTEXT_PREFIX = "For context:"
+_TRANSFER_TOOL = "transfer_to_agent"
+# The responses left in the turns run under `scripted`.
+_script = contextvars.ContextVar("fake_model_script", default=None)
+
+
+def _parse_directives(text: str) -> list[tuple]:
+    directives = []
+    for line in text.strip().splitlines():
+        match = _DIRECTIVE.match(line.strip())
+        if not match:
+            return []
+        args = json.loads(match["args"]) if match["args"] else {}
+        directives.append((match["agent"], match["tool"], args))
+    return directives
+
+
+def _last_user_text(contents: list[types.Content]) -> str:
+    """Returns the latest message typed by the user, skipping other agents' turns."""
+    for content in reversed(contents):
+        if content.role != "user" or not content.parts:
+            continue
+        text = "".join(part.text or "" for part in content.parts)
+        if text and not text.startswith(_CONTEXT_PREFIX):
+            return text
+    return ""
+
+
+class FakeLlm(BaseLlm):
+    """
+    A deterministic model that needs no credentials or network.
+
+    A user message made of directive lines such as
+    `/Checkmate.get_todo_list {"user_id": 1}` makes the model call those tools
+    in parallel, transferring to the named agent first if the current one does
+    not have them. Once the tools respond the model replies with their results
+    as JSON. Any other message is echoed back.
+
+    Under `scripted`, the model returns the given responses instead.
+    """
+
+    model: str = "fake"
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        script = _script.get()
+        if script is not None:
+            delay, content = script.popleft() if script else (0, _text(""))
+            if callable(content):
+                content = content()
+        else:
+            delay, content = LATENCY_SECONDS, self._respond(llm_request)
+        if delay:
+            await asyncio.sleep(delay)
+        text = content.parts[0].text if content.parts else None
+        if stream and text:
+            words = text.split(" ")
+            for i, word in enumerate(words):
+                chunk = word if i == len(words) - 1 else word + " "
+                yield LlmResponse(
+                    content=types.Content(role="model", parts=[types.Part(text=chunk)]),
+                    partial=True,
+                )
+        yield LlmResponse(content=content, turn_complete=True)
+
+    def _respond(self, llm_request: LlmRequest) -> types.Content:
+        contents = llm_request.contents or []
+        last = contents[-1] if contents else None
+        responses = [
+            part.function_response
+            for part in (last.parts or [] if last else [])
+            if part.function_response
+        ]
+        if responses:
+            results = {r.name: r.response for r in responses}
+            return _text(json.dumps(results, default=str, sort_keys=True))
+
+        text = _last_user_text(contents)
+        directives = _parse_directives(text)
+        tools = llm_request.tools_dict
+        calls = [
+            types.Part(function_call=types.FunctionCall(name=tool, args=args))
+            for _, tool, args in directives
+            if tool in tools
+        ]
+        if calls:
+            return types.Content(role="model", parts=calls)
+        agents = [agent for agent, tool, _ in directives if agent and tool not in tools]
+        if agents and _TRANSFER_TOOL in tools:
+            return types.Content(
+                role="model",
+                parts=[
+                    types.Part(
+                        function_call=types.FunctionCall(
+                            name=_TRANSFER_TOOL, args={"agent_name": agents[0]}
+                        )
+                    )
+                ],
+            )
+        return _text(f"You said: {text}" if text else "Hello! How can I help?")
+
+
+def _text(text: str) -> types.Content:
+    return types.Content(role="model", parts=[types.Part(text=text)])
+
+
+@contextlib.contextmanager
+def scripted(
+    responses: list[tuple[float, types.Content | Callable[[], types.Content]]],
+):
+    """
+    Makes the fake model return `responses` in order within the block.
+
+    Once they run out the model replies with an empty text, ending the turn.
+
+    Args:
+        responses: The seconds to wait before each response, and the response
+            or a function building it when it is due.
+    """
+    token = _script.set(collections.deque(responses))
+    try:
+        yield
+    finally:
+        _script.reset(token)
+
+
+_model = None
+
+
+def resolve(model: str):
+    """
+    Returns the model an agent should use.
+
+    Args:
+        model: The Gemini model name the agent is configured with.
+
+    Returns:
+        `model`, or the shared `FakeLlm` when `FAKE_MODEL` is set.
+    """
+    global _model
+    if not ENABLED:
+        return model
+    if _model is None:
+        _model = FakeLlm()
+    return _model
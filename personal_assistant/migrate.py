@@ -0,0 +1,47 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Creates or updates the schema of the assistant database.
+
+Run once per deployment, before the agents start:
+
+    python -m personal_assistant.migrate
+"""
+
+import argparse
+import logging
+
+from personal_assistant import database
+
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--db-url", help="A SQLAlchemy URL. Defaults to `DB_URL` or Cloud SQL."
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    if args.db_url:
+        engine = database.connect_with_url(args.db_url)
+    else:
+        engine = database.get_engine()
+    database.create_tables(engine)
+    logger.info("Schema of %s is up to date.", engine.url)
+
+
+if __name__ == "__main__":
+    main()
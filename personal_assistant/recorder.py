@@ -0,0 +1,218 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Records agent turns so that `benchmarks.replay` can run them again.
+
+With `RECORD_PATH` set, every turn is appended to that file as one JSON line:
+the user's message and each model response, function call and tool result
+with its offset from the start of the turn. Tool results are recorded as
+their status, size and ID fields, so that a replay can map the IDs it creates
+to the recorded ones, unless `RECORD_RESULTS` is set to keep them whole.
+
+The log holds the users' messages, the model's replies and the arguments of
+every tool call, so it is as sensitive as the database: it is created readable
+by its owner only.
+"""
+
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+from collections.abc import AsyncGenerator, Iterator
+
+from google.adk.events import Event
+
+logger = logging.getLogger(__name__)
+
+RECORD_PATH = os.environ.get("RECORD_PATH")
+ENABLED = bool(RECORD_PATH)
+RECORD_RESULTS = os.environ.get("RECORD_RESULTS", "").lower() in ("1", "true", "yes")
+# Bumped when the fields of a recorded turn change.
+FORMAT_VERSION = 2
+
+
+def ids(response) -> dict:
+    """The ID fields of a tool result, such as the `task_id` of a new task."""
+    if not isinstance(response, dict):
+        return {}
+    return {
+        key: value
+        for key, value in response.items()
+        if key.endswith("_id") and isinstance(value, str)
+    }
+
+
+def _result(name: str, response) -> list:
+    """
+    `[name, status, size, ids]` of a tool result, plus the result if recorded.
+    """
+    status = response.get("status") if isinstance(response, dict) else None
+    encoded = json.dumps(response, separators=(",", ":"), default=str)
+    result = [name, status, len(encoded), ids(response)]
+    if RECORD_RESULTS:
+        result.append(response)
+    return result
+
+
+def step(event: Event, elapsed: float) -> dict | None:
+    """
+    The parts of an event a replay needs, or None if it has none.
+
+    Args:
+        event: An event of the turn.
+        elapsed: Seconds since the turn started.
+
+    Returns:
+        The event's author, offset in ms, text, function calls and tool
+        results, as recorded.
+    """
+    parts = event.content.parts or [] if event.content else []
+    step = {}
+    text = "".join(part.text or "" for part in parts if not part.thought)
+    if text:
+        step["text"] = text
+    calls = [[call.name, call.args or {}] for call in event.get_function_calls()]
+    if calls:
+        step["calls"] = calls
+    results = [_result(r.name, r.response) for r in event.get_function_responses()]
+    if results:
+        step["results"] = results
+    if not step:
+        return None
+    return {"author": event.author, "ms": round(elapsed * 1000, 1), **step}
+
+
+class Recorder:
+    """
+    Appends turns to a JSON Lines file.
+
+    Each turn is written with a single `write` to a file opened for appending,
+    so turns finishing together, in this process or in other server workers,
+    do not interleave.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.turns = 0
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+
+    async def record(
+        self,
+        events: AsyncGenerator[Event, None],
+        user_id: str,
+        session_id: str,
+        message: str,
+    ) -> AsyncGenerator[Event, None]:
+        """
+        Passes the events of a turn through, recording them.
+
+        Args:
+            events: The events from `Runner.run_async`.
+            user_id: The user running the turn.
+            session_id: The session the turn runs in.
+            message: The text the user sent.
+
+        Returns:
+            The same events.
+        """
+        turn = {
+            "v": FORMAT_VERSION,
+            "at": round(time.time(), 3),
+            "user": user_id,
+            "session": session_id,
+            "message": message,
+            "steps": [],
+        }
+        start = time.perf_counter()
+        try:
+            async with contextlib.aclosing(events):
+                async for event in events:
+                    # Streamed chunks are repeated in the final event.
+                    if not event.partial:
+                        recorded = step(event, time.perf_counter() - start)
+                        if recorded:
+                            turn["steps"].append(recorded)
+                    yield event
+        except BaseException as e:
+            turn["error"] = type(e).__name__
+            raise
+        finally:
+            turn["ms"] = round((time.perf_counter() - start) * 1000, 1)
+            self.write(turn)
+
+    def write(self, turn: dict) -> None:
+        line = json.dumps(turn, separators=(",", ":"), default=str) + "\n"
+        try:
+            os.write(self._fd, line.encode())
+        except OSError:
+            logger.exception("Could not record a turn to %s.", self.path)
+            return
+        self.turns += 1
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+_recorder = None
+_lock = threading.Lock()
+
+
+def get_recorder() -> Recorder:
+    """Returns the recorder shared by the process, opening it on first use."""
+    global _recorder
+    if _recorder is None:
+        with _lock:
+            if _recorder is None:
+                _recorder = Recorder(RECORD_PATH)
+    return _recorder
+
+
+def record(
+    events: AsyncGenerator[Event, None], user_id: str, session_id: str, message: str
+) -> AsyncGenerator[Event, None]:
+    """Returns `events`, recording the turn if `RECORD_PATH` is set."""
+    if not ENABLED:
+        return events
+    return get_recorder().record(events, user_id, session_id, message)
+
+
+def close() -> None:
+    global _recorder
+    with _lock:
+        if _recorder is not None:
+            _recorder.close()
+            _recorder = None
+
+
+def load(path: str) -> Iterator[dict]:
+    """
+    Reads recorded turns.
+
+    Args:
+        path: A file written by the recorder.
+
+    Returns:
+        The turns in the order they finished.
+    """
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            turn = json.loads(line)
+            if turn.get("v") != FORMAT_VERSION:
+                raise ValueError(f"Unsupported recording format: {turn.get('v')}")
+            yield turn
@@ -0,0 +1,298 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Deadlines, retries and a circuit breaker for database-backed tools."""
+
+import asyncio
+import concurrent.futures
+import functools
+import logging
+import os
+import random
+import threading
+import time
+
+import sqlalchemy
+
+logger = logging.getLogger(__name__)
+
+# Time a tool may take before the agent is told it failed.
+TOOL_DEADLINE_SECONDS = float(os.environ.get("TOOL_DEADLINE_SECONDS", "10"))
+# Attempts for idempotent tools failing with a transient error.
+MAX_ATTEMPTS = int(os.environ.get("TOOL_MAX_ATTEMPTS", "3"))
+RETRY_BASE_SECONDS = 0.1
+RETRY_MAX_SECONDS = 1.0
+# Consecutive transient failures that open the circuit, and how long it stays
+# open before a trial call is let through.
+BREAKER_FAILURE_THRESHOLD = int(os.environ.get("DB_BREAKER_FAILURES", "5"))
+BREAKER_RESET_SECONDS = float(os.environ.get("DB_BREAKER_RESET_SECONDS", "30"))
+
+_TRANSIENT_ERRORS = (
+    sqlalchemy.exc.OperationalError,
+    sqlalchemy.exc.InterfaceError,
+    sqlalchemy.exc.DisconnectionError,
+    sqlalchemy.exc.TimeoutError,
+    ConnectionError,
+    TimeoutError,
+)
+# Raised by `future.result` and `asyncio.wait_for` at a deadline; before
+# Python 3.11 they are not `TimeoutError`.
+_DEADLINE_ERRORS = (TimeoutError, concurrent.futures.TimeoutError, asyncio.TimeoutError)
+
+
+def is_transient(error: BaseException) -> bool:
+    """
+    Whether an error is likely to go away on retry.
+
+    Connection failures, dropped connections and pool or connect timeouts are
+    transient; constraint violations and programming errors are not.
+    """
+    if isinstance(error, sqlalchemy.exc.DBAPIError) and error.connection_invalidated:
+        return True
+    return isinstance(error, _TRANSIENT_ERRORS)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the database while the circuit is open."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Database unavailable; retry in {retry_after:.0f}s.")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Fails fast after repeated transient failures.
+
+    After `failure_threshold` consecutive failures the circuit opens and calls
+    fail immediately for `reset_seconds`. Then a single trial call is let
+    through: success closes the circuit, failure opens it again. A trial that
+    ends with neither, e.g. on a programming error, lets the next one through.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+        reset_seconds: float = BREAKER_RESET_SECONDS,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._failures = 0
+        self._opened_at = None
+        # Identifies the running half-open trial, if any.
+        self._trial = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at < self.reset_seconds:
+                return "open"
+            return "half_open"
+
+    def before_call(self) -> object | None:
+        """
+        Raises `CircuitOpenError` if the call must not reach the database.
+
+        Returns:
+            A token if the call is the half-open trial, to pass to `end_trial`
+            once it ends, otherwise None.
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return None
+            remaining = self.reset_seconds - (time.monotonic() - self._opened_at)
+            if remaining > 0 or self._trial is not None:
+                raise CircuitOpenError(max(remaining, 1.0))
+            self._trial = object()
+            return self._trial
+
+    def end_trial(self, trial: object | None) -> None:
+        """Lets another trial through if `trial` ended without an outcome."""
+        with self._lock:
+            if trial is not None and self._trial is trial:
+                self._trial = None
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._trial is not None or self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    logger.warning("Database circuit breaker opened.")
+                self._opened_at = time.monotonic()
+            self._trial = None
+
+
+breaker = CircuitBreaker()
+
+_executor = concurrent.futures.ThreadPoolExecutor(
+    max_workers=int(os.environ.get("TOOL_THREADS", "16")),
+    thread_name_prefix="db-tool",
+)
+_local = threading.local()
+
+
+def error_result(error_code: str, message: str, retryable: bool, **extra) -> dict:
+    """Builds the structured error returned to the agent instead of raising."""
+    return {
+        "status": "error",
+        "error_code": error_code,
+        "message": message,
+        "retryable": retryable,
+        **extra,
+    }
+
+
+def current_deadline() -> float | None:
+    """The `time.monotonic()` deadline of the tool running on this thread, if any."""
+    return getattr(_local, "deadline", None)
+
+
+def _backoff(attempt: int) -> float:
+    """Full-jitter exponential backoff."""
+    return random.uniform(0, min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2**attempt))
+
+
+def _call_with_retries(
+    func, idempotent: bool, deadline: float, args, kwargs, outermost: bool = True
+):
+    """
+    Calls `func`, retrying transient errors if it is idempotent.
+
+    Only the outermost of nested tool calls goes through the circuit breaker,
+    so one database failure is counted once and a nested call is not refused
+    during its caller's half-open trial.
+    """
+    attempt = 0
+    while True:
+        trial = breaker.before_call() if outermost else None
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            if not is_transient(e):
+                raise
+            if outermost:
+                breaker.record_failure()
+            attempt += 1
+            delay = _backoff(attempt)
+            if (
+                not idempotent
+                or attempt >= MAX_ATTEMPTS
+                or time.monotonic() + delay >= deadline
+            ):
+                raise
+            logger.info("Retrying %s after transient error: %s", func.__name__, e)
+            time.sleep(delay)
+        else:
+            # A call that only returned after its deadline was already counted
+            # as a failure and must not close the circuit.
+            if outermost and time.monotonic() <= deadline:
+                breaker.record_success()
+            return result
+        finally:
+            breaker.end_trial(trial)
+
+
+def resilient(idempotent: bool, deadline_seconds: float | None = None):
+    """
+    Decorates a database tool with a deadline, retries and the circuit breaker.
+
+    The tool runs on a worker thread; if it does not finish within the deadline
+    the agent gets an error result right away instead of waiting on a hung
+    connection. Idempotent tools are retried with jittered backoff on transient
+    errors while the deadline allows. Every failure is returned as an
+    `error_result` dict the agent can relay to the user.
+
+    Tools calling other decorated tools run them inline, under the outer
+    tool's deadline, and only the outer call counts towards the breaker.
+    `wrapper.run_async` awaits the tool from an event loop instead of blocking
+    it.
+
+    Args:
+        idempotent: Whether running the tool twice has the same effect as
+            running it once, which makes it safe to retry.
+        deadline_seconds: The deadline. Defaults to `TOOL_DEADLINE_SECONDS`.
+    """
+
+    def decorator(func):
+        def submit(args, kwargs):
+            timeout = deadline_seconds or TOOL_DEADLINE_SECONDS
+            deadline = time.monotonic() + timeout
+
+            def run():
+                _local.deadline = deadline
+                try:
+                    return _call_with_retries(func, idempotent, deadline, args, kwargs)
+                finally:
+                    _local.deadline = None
+
+            return _executor.submit(run), timeout
+
+        def to_error_result(error: Exception, timeout: float) -> dict:
+            if isinstance(error, _DEADLINE_ERRORS):
+                logger.warning("%s exceeded its %.1fs deadline.", func.__name__, timeout)
+                breaker.record_failure()
+                message = f"The database did not respond within {timeout:.0f} seconds."
+                if not idempotent:
+                    message += " The change may or may not have been saved."
+                return error_result("DEADLINE_EXCEEDED", message, retryable=idempotent)
+            if isinstance(error, CircuitOpenError):
+                return error_result(
+                    "DATABASE_UNAVAILABLE",
+                    str(error),
+                    retryable=True,
+                    retry_after_seconds=round(error.retry_after),
+                )
+            if not is_transient(error):
+                raise error
+            logger.warning("%s failed: %s", func.__name__, error)
+            return error_result(
+                "DATABASE_ERROR",
+                "The database is temporarily unavailable.",
+                retryable=True,
+            )
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if getattr(_local, "deadline", None) is not None:
+                return _call_with_retries(
+                    func, idempotent, _local.deadline, args, kwargs, outermost=False
+                )
+            future, timeout = submit(args, kwargs)
+            try:
+                return future.result(timeout=timeout)
+            except Exception as e:
+                return to_error_result(e, timeout)
+
+        async def run_async(*args, **kwargs):
+            """Runs the tool without blocking the event loop."""
+            future, timeout = submit(args, kwargs)
+            try:
+                return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+            except Exception as e:
+                return to_error_result(e, timeout)
+
+        wrapper.run_async = run_async
+        return wrapper
+
+    return decorator
@@ -0,0 +1,359 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""HTTP serving entry point for the assistant.
+
+Serves chat and streaming chat over the ADK runner from several worker
+processes, each with its own engine, session cache and write-behind journal:
+
+    python -m personal_assistant.server --workers 4 --port 8080
+
+Each worker runs at most `SERVER_MAX_CONCURRENT_RUNS` agent runs at a time and
+queues up to `SERVER_MAX_QUEUED_RUNS` more; beyond that, or after waiting
+`SERVER_QUEUE_TIMEOUT_SECONDS` in the queue, requests get a 503 with
+`Retry-After`. On SIGTERM the worker stops taking requests, lets running ones
+finish for up to `SERVER_DRAIN_TIMEOUT_SECONDS`, then flushes buffered session
+events and the write-behind journal.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+
+import pydantic
+import sqlalchemy
+import uvicorn
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from google.adk.agents.run_config import RunConfig, StreamingMode
+from google.adk.runners import Runner
+from google.genai import types
+from starlette.background import BackgroundTask
+
+from personal_assistant import (
+    archival,
+    database,
+    recorder,
+    resilience,
+    single_flight,
+    warmup,
+    write_behind,
+)
+from personal_assistant.agent import root_agent
+from personal_assistant.session_service import SqlSessionService
+
+logger = logging.getLogger(__name__)
+
+APP_NAME = "personal_assistant"
+WORKERS = int(os.environ.get("SERVER_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Per worker: agent runs in progress at once, and requests waiting for one.
+MAX_CONCURRENT_RUNS = int(os.environ.get("SERVER_MAX_CONCURRENT_RUNS", "32"))
+MAX_QUEUED_RUNS = int(os.environ.get("SERVER_MAX_QUEUED_RUNS", "64"))
+QUEUE_TIMEOUT_SECONDS = float(os.environ.get("SERVER_QUEUE_TIMEOUT_SECONDS", "5"))
+DRAIN_TIMEOUT_SECONDS = float(os.environ.get("SERVER_DRAIN_TIMEOUT_SECONDS", "30"))
+RETRY_AFTER_SECONDS = 1
+# Time a worker may take to import the agents and answer the supervisor's
+# health checks before it is restarted.
+WORKER_HEALTHCHECK_SECONDS = float(
+    os.environ.get("SERVER_WORKER_HEALTHCHECK_SECONDS", "60")
+)
+
+
+class Overloaded(Exception):
+    """Raised when a request cannot be admitted; served as a 503."""
+
+
+class Admission:
+    """
+    Limits the agent runs in progress in this worker.
+
+    Requests beyond `max_running` wait in a queue of at most `max_queued` for
+    up to `queue_timeout` seconds. Rejecting early keeps latency bounded under
+    overload instead of letting every request slow down together.
+    """
+
+    def __init__(self, max_running: int, max_queued: int, queue_timeout: float):
+        self.max_running = max_running
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self.running = 0
+        self.queued = 0
+        self.rejected = 0
+        self.draining = False
+        self._slots = asyncio.Semaphore(max_running)
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    async def acquire(self) -> None:
+        """Waits for a run slot, raising `Overloaded` if none is available."""
+        if self.draining:
+            self.rejected += 1
+            raise Overloaded("The server is shutting down.")
+        if self._slots.locked() and self.queued >= self.max_queued:
+            self.rejected += 1
+            raise Overloaded("Too many requests are waiting.")
+        self.queued += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise Overloaded("Timed out waiting for capacity.") from None
+        finally:
+            self.queued -= 1
+        self.running += 1
+        self._idle.clear()
+
+    def release(self) -> None:
+        self.running -= 1
+        self._slots.release()
+        if not self.running:
+            self._idle.set()
+
+    async def drain(self, timeout: float) -> bool:
+        """Stops admitting requests and waits for running ones to finish."""
+        self.draining = True
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            logger.warning("%d runs still in progress after draining.", self.running)
+            return False
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "max_running": self.max_running,
+            "max_queued": self.max_queued,
+        }
+
+
+class ChatRequest(pydantic.BaseModel):
+    user_id: str
+    message: str
+    session_id: str | None = None
+
+
+def _ping_database() -> None:
+    with database.get_engine().connect() as conn:
+        conn.execute(sqlalchemy.text("SELECT 1"))
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+    logging.basicConfig(level=logging.INFO)
+    await asyncio.to_thread(write_behind.start, WORKERS)
+    session_service = SqlSessionService(database.get_engine())
+    app.state.runner = Runner(
+        agent=root_agent, app_name=APP_NAME, session_service=session_service
+    )
+    app.state.admission = Admission(
+        MAX_CONCURRENT_RUNS, MAX_QUEUED_RUNS, QUEUE_TIMEOUT_SECONDS
+    )
+    app.state.warm_up = None
+    if warmup.ENABLED:
+        # Before the worker accepts connections, so no request runs cold.
+        app.state.warm_up = await warmup.warm_up(app.state.runner)
+    logger.info("Worker %d ready.", os.getpid())
+    yield
+    await app.state.admission.drain(DRAIN_TIMEOUT_SECONDS)
+    await session_service.close()
+    await asyncio.to_thread(write_behind.close)
+    recorder.close()
+    database.get_engine().dispose()
+    logger.info("Worker %d drained.", os.getpid())
+
+
+app = FastAPI(title="Personal Assistant", lifespan=lifespan)
+
+
+@app.exception_handler(Overloaded)
+async def _overloaded(request: Request, error: Overloaded):
+    return JSONResponse(
+        {"detail": str(error)},
+        status_code=503,
+        headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+    )
+
+
+async def _session_id(runner: Runner, chat: ChatRequest) -> str:
+    """Returns the request's session, creating one if it has none."""
+    service = runner.session_service
+    if chat.session_id is None:
+        session = await service.create_session(app_name=APP_NAME, user_id=chat.user_id)
+        return session.id
+    session = await service.get_session(
+        app_name=APP_NAME, user_id=chat.user_id, session_id=chat.session_id
+    )
+    if session is None:
+        raise HTTPException(404, f"Session {chat.session_id} not found.")
+    return session.id
+
+
+def _message(chat: ChatRequest) -> types.Content:
+    return types.Content(role="user", parts=[types.Part(text=chat.message)])
+
+
+@app.post("/chat")
+async def chat(chat: ChatRequest, request: Request):
+    """Runs one turn and returns the agent's final reply."""
+    runner, admission = request.app.state.runner, request.app.state.admission
+    await admission.acquire()
+    try:
+        session_id = await _session_id(runner, chat)
+        reply, author = "", None
+        events = runner.run_async(
+            user_id=chat.user_id, session_id=session_id, new_message=_message(chat)
+        )
+        async for event in recorder.record(
+            events, chat.user_id, session_id, chat.message
+        ):
+            if event.is_final_response() and event.content and event.content.parts:
+                reply = "".join(part.text or "" for part in event.content.parts)
+                author = event.author
+        return {"session_id": session_id, "reply": reply, "author": author}
+    finally:
+        admission.release()
+
+
+@app.post("/chat/stream")
+async def chat_stream(chat: ChatRequest, request: Request):
+    """Runs one turn, streaming every event as a server-sent event."""
+    runner, admission = request.app.state.runner, request.app.state.admission
+    await admission.acquire()
+    released = False
+
+    def release():
+        nonlocal released
+        if not released:
+            released = True
+            admission.release()
+
+    try:
+        session_id = await _session_id(runner, chat)
+    except BaseException:
+        release()
+        raise
+
+    async def release_later():
+        release()
+
+    async def events():
+        try:
+            events = runner.run_async(
+                user_id=chat.user_id,
+                session_id=session_id,
+                new_message=_message(chat),
+                run_config=RunConfig(streaming_mode=StreamingMode.SSE),
+            )
+            async for event in recorder.record(
+                events, chat.user_id, session_id, chat.message
+            ):
+                data = event.model_dump_json(exclude_none=True, by_alias=True)
+                yield f"data: {data}\n\n"
+        except Exception as e:
+            logger.exception("Run failed in session %s.", session_id)
+            yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+        finally:
+            release()
+
+    # The background task releases the slot if the client disconnects before
+    # the stream starts.
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"X-Session-Id": session_id},
+        background=BackgroundTask(release_later),
+    )
+
+
+@app.get("/healthz")
+async def healthz():
+    """Liveness: the worker's event loop is responsive."""
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+async def readyz(request: Request):
+    """Readiness: the worker takes requests and can reach the database."""
+    admission = request.app.state.admission
+    body = {"pid": os.getpid(), **admission.stats()}
+    if admission.draining:
+        return JSONResponse({"status": "draining", **body}, status_code=503)
+    if resilience.breaker.state == "open":
+        return JSONResponse({"status": "database_unavailable", **body}, status_code=503)
+    try:
+        await asyncio.wait_for(
+            asyncio.to_thread(_ping_database), database.CONNECT_TIMEOUT_SECONDS
+        )
+    except Exception as e:
+        logger.warning("Readiness check failed: %s", e)
+        return JSONResponse({"status": "database_unavailable", **body}, status_code=503)
+    if write_behind.ENABLED:
+        body["write_behind"] = write_behind.get_queue().stats()
+        # Journaled writes would pile up until the worker is restarted.
+        if not body["write_behind"]["flusher_alive"]:
+            return JSONResponse(
+                {"status": "write_behind_stopped", **body}, status_code=503
+            )
+    return {"status": "ready", **body}
+
+
+@app.get("/metrics")
+async def metrics(request: Request):
+    """This worker's admission, read coalescing and write-behind counters."""
+    body = {
+        "pid": os.getpid(),
+        "admission": request.app.state.admission.stats(),
+        "read_coalescing": single_flight.stats(),
+        "database_breaker": resilience.breaker.state,
+        "warm_up": request.app.state.warm_up,
+    }
+    if write_behind.ENABLED:
+        body["write_behind"] = write_behind.get_queue().stats()
+    return body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default=os.environ.get("SERVER_HOST", "127.0.0.1"))
+    parser.add_argument(
+        "--port", type=int, default=int(os.environ.get("PORT", "8080"))
+    )
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    args = parser.parse_args()
+    # Workers read the count to claim their own write-behind journal.
+    os.environ["SERVER_WORKERS"] = str(args.workers)
+    # Once, before the workers start, rather than in each of them.
+    database.create_tables(database.get_engine())
+    database.get_engine().dispose()
+    # In this supervisor process, so that workers do not compete for the rows.
+    archival.start_background()
+    uvicorn.run(
+        "personal_assistant.server:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        timeout_graceful_shutdown=DRAIN_TIMEOUT_SECONDS,
+        timeout_worker_healthcheck=WORKER_HEALTHCHECK_SECONDS,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,718 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Durable session service backed by the assistant's SQLAlchemy engine."""
+
+import asyncio
+import copy
+import logging
+import time
+import uuid
+from collections import OrderedDict, defaultdict
+from typing import Any
+
+import sqlalchemy
+from google.adk.errors.already_exists_error import AlreadyExistsError
+from google.adk.events import Event
+from google.adk.sessions import BaseSessionService, Session
+from google.adk.sessions.base_session_service import (
+    GetSessionConfig,
+    ListSessionsResponse,
+)
+from google.adk.sessions.state import State
+from sqlalchemy import (
+    JSON,
+    Column,
+    Float,
+    Index,
+    MetaData,
+    String,
+    Table,
+    Text,
+)
+
+logger = logging.getLogger(__name__)
+
+session_metadata = MetaData()
+
+sessions = Table(
+    "adk_sessions",
+    session_metadata,
+    Column("app_name", String, primary_key=True),
+    Column("user_id", String, primary_key=True),
+    Column("session_id", String, primary_key=True),
+    Column("state", JSON),
+    Column("create_time", Float),
+    Column("update_time", Float),
+    Index("ix_adk_sessions_app_update_time", "app_name", "update_time"),
+)
+
+events = Table(
+    "adk_events",
+    session_metadata,
+    Column("app_name", String, primary_key=True),
+    Column("user_id", String, primary_key=True),
+    Column("session_id", String, primary_key=True),
+    Column("event_id", String, primary_key=True),
+    Column("timestamp", Float),
+    Column("payload", Text),
+    Index(
+        "ix_adk_events_session_timestamp",
+        "app_name",
+        "user_id",
+        "session_id",
+        "timestamp",
+    ),
+)
+
+app_states = Table(
+    "adk_app_states",
+    session_metadata,
+    Column("app_name", String, primary_key=True),
+    Column("state", JSON),
+    Column("update_time", Float),
+)
+
+user_states = Table(
+    "adk_user_states",
+    session_metadata,
+    Column("app_name", String, primary_key=True),
+    Column("user_id", String, primary_key=True),
+    Column("state", JSON),
+    Column("update_time", Float),
+)
+
+
+def _split_state(state: dict[str, Any] | None) -> dict[str, dict[str, Any]]:
+    """Splits a prefixed state dict into app, user and session scopes."""
+    deltas = {"app": {}, "user": {}, "session": {}}
+    for key, value in (state or {}).items():
+        if key.startswith(State.APP_PREFIX):
+            deltas["app"][key.removeprefix(State.APP_PREFIX)] = value
+        elif key.startswith(State.USER_PREFIX):
+            deltas["user"][key.removeprefix(State.USER_PREFIX)] = value
+        elif not key.startswith(State.TEMP_PREFIX):
+            deltas["session"][key] = value
+    return deltas
+
+
+class _CachedSession:
+    """A session as last seen in storage, plus the state it was merged with."""
+
+    def __init__(self, session: Session, update_time: float):
+        self.session = session
+        self.update_time = update_time
+
+
+class _PendingWrites:
+    """Events and coalesced state deltas that have not been flushed yet."""
+
+    def __init__(self):
+        self.events: list[dict] = []
+        self.session_deltas: dict[tuple, dict[str, Any]] = {}
+        self.session_times: dict[tuple, float] = {}
+        self.user_deltas: dict[tuple, dict[str, Any]] = {}
+        self.app_deltas: dict[str, dict[str, Any]] = {}
+
+    def __bool__(self) -> bool:
+        return bool(self.events or self.session_times)
+
+    def touches(self, key: tuple) -> bool:
+        return key in self.session_times
+
+    def merge_into(self, newer: "_PendingWrites") -> "_PendingWrites":
+        """Puts a failed batch back in front of writes queued since."""
+        self.events.extend(newer.events)
+        for attr in ("session_deltas", "user_deltas", "app_deltas"):
+            older = getattr(self, attr)
+            for key, delta in getattr(newer, attr).items():
+                older.setdefault(key, {}).update(delta)
+        self.session_times.update(newer.session_times)
+        return self
+
+
+class SqlSessionService(BaseSessionService):
+    """
+    A session service that persists sessions, events and app/user/session state.
+
+    Events and state deltas are buffered in memory and written in a single
+    transaction per flush, either when `max_batch_events` events are pending or
+    `flush_interval` seconds after the first unflushed event. Deltas to the same
+    state scope are coalesced, so a turn that sets a key several times costs one
+    row update. Recently used sessions are cached; a cached session is
+    revalidated against storage with one cheap query so several worker processes
+    can share the same database.
+    """
+
+    def __init__(
+        self,
+        engine: sqlalchemy.engine.base.Engine,
+        *,
+        flush_interval: float = 0.05,
+        max_batch_events: int = 64,
+        cache_size: int = 1024,
+        validate_cache: bool = True,
+    ):
+        """
+        Args:
+            engine: The SQLAlchemy engine to store sessions in, with the tables
+                created by `database.create_tables`.
+            flush_interval: Maximum time in seconds an appended event stays
+                buffered before it is written.
+            max_batch_events: Number of buffered events that forces a flush.
+            cache_size: Number of sessions kept in memory. 0 disables caching.
+            validate_cache: Whether to check that a cached session is still
+                current before serving it. Only disable this when a single
+                process owns the database.
+        """
+        self._engine = engine
+        self._flush_interval = flush_interval
+        self._max_batch_events = max_batch_events
+        self._cache_size = cache_size
+        self._validate_cache = validate_cache
+        self._cache: OrderedDict[tuple, _CachedSession] = OrderedDict()
+        self._app_states: dict[str, tuple[float, dict[str, Any]]] = {}
+        self._user_states: dict[tuple, tuple[float, dict[str, Any]]] = {}
+        self._pending = _PendingWrites()
+        self._flushing: _PendingWrites | None = None
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: asyncio.Task | None = None
+
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: dict[str, Any] | None = None,
+        session_id: str | None = None,
+    ) -> Session:
+        session_id = (
+            session_id.strip()
+            if session_id and session_id.strip()
+            else str(uuid.uuid4())
+        )
+        deltas = _split_state(state)
+        now = time.time()
+        created = await asyncio.to_thread(
+            self._create_session_sync, app_name, user_id, session_id, deltas, now
+        )
+        if not created:
+            raise AlreadyExistsError(f"Session with id {session_id} already exists.")
+        if deltas["app"] or deltas["user"]:
+            await self.flush()
+            self._app_states.pop(app_name, None)
+            self._user_states.pop((app_name, user_id), None)
+
+        session = Session(
+            app_name=app_name,
+            user_id=user_id,
+            id=session_id,
+            state=deltas["session"],
+            last_update_time=now,
+        )
+        self._remember(session, now)
+        return await self._merged_copy(session)
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: GetSessionConfig | None = None,
+    ) -> Session | None:
+        key = (app_name, user_id, session_id)
+        cached = self._cache.get(key)
+        if cached is not None and not self._is_unflushed(key):
+            if self._validate_cache and not await asyncio.to_thread(
+                self._is_current_sync, key, cached.update_time
+            ):
+                self._forget(key)
+                cached = None
+        if cached is None:
+            loaded = await asyncio.to_thread(self._load_session_sync, key)
+            if loaded is None:
+                return None
+            session, update_time = loaded
+            cached = self._remember(session, update_time)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+
+        session = copy.deepcopy(cached.session)
+        if config:
+            if config.num_recent_events:
+                session.events = session.events[-config.num_recent_events :]
+            if config.after_timestamp:
+                session.events = [
+                    e for e in session.events if e.timestamp >= config.after_timestamp
+                ]
+        return await self._merged_copy(session, copied=True)
+
+    async def preload(self, *, app_name: str, limit: int) -> int:
+        """
+        Loads the most recently updated sessions into the cache.
+
+        Args:
+            app_name: The application whose sessions to load.
+            limit: The number of sessions to load, capped by the cache size.
+
+        Returns:
+            The number of sessions loaded.
+        """
+        limit = min(limit, self._cache_size)
+        if limit <= 0:
+            return 0
+        loaded, app_state, user_states = await asyncio.to_thread(
+            self._load_recent_sessions_sync, app_name, limit
+        )
+        self._app_states.setdefault(app_name, app_state)
+        for user_id, user_state in user_states.items():
+            self._user_states.setdefault((app_name, user_id), user_state)
+        count = 0
+        # Oldest first, so that the most recent end up last in LRU order.
+        for session, update_time in reversed(loaded):
+            if (app_name, session.user_id, session.id) in self._cache:
+                continue
+            self._remember(session, update_time)
+            count += 1
+        return count
+
+    async def list_sessions(
+        self, *, app_name: str, user_id: str | None = None
+    ) -> ListSessionsResponse:
+        await self.flush()
+        rows = await asyncio.to_thread(self._list_sessions_sync, app_name, user_id)
+        result = []
+        for row in rows:
+            session = Session(
+                app_name=row.app_name,
+                user_id=row.user_id,
+                id=row.session_id,
+                state=dict(row.state or {}),
+                last_update_time=row.update_time,
+            )
+            result.append(await self._merged_copy(session, copied=True))
+        return ListSessionsResponse(sessions=result)
+
+    async def delete_session(
+        self, *, app_name: str, user_id: str, session_id: str
+    ) -> None:
+        await self.flush()
+        key = (app_name, user_id, session_id)
+        self._forget(key)
+        await asyncio.to_thread(self._delete_session_sync, key)
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        if event.partial:
+            return event
+        key = (session.app_name, session.user_id, session.id)
+        cached = self._cache.get(key)
+        if cached is None:
+            loaded = await asyncio.to_thread(self._load_session_sync, key)
+            if loaded is None:
+                logger.warning("Failed to append event: session %s not found.", key)
+                return event
+            cached = self._remember(*loaded)
+        await self._ensure_scoped_state(session.app_name, session.user_id)
+
+        await super().append_event(session=session, event=event)
+        session.last_update_time = event.timestamp
+
+        deltas = _split_state(event.actions.state_delta if event.actions else None)
+        cached.session.events.append(event)
+        cached.session.state.update(deltas["session"])
+        cached.session.last_update_time = event.timestamp
+        cached.update_time = event.timestamp
+        self._cache[key] = cached
+        if deltas["app"]:
+            _, state = self._app_states[session.app_name]
+            state.update(deltas["app"])
+            self._app_states[session.app_name] = (event.timestamp, state)
+        if deltas["user"]:
+            user_key = (session.app_name, session.user_id)
+            _, state = self._user_states[user_key]
+            state.update(deltas["user"])
+            self._user_states[user_key] = (event.timestamp, state)
+
+        pending = self._pending
+        pending.events.append(
+            {
+                "app_name": session.app_name,
+                "user_id": session.user_id,
+                "session_id": session.id,
+                "event_id": event.id,
+                "timestamp": event.timestamp,
+                "payload": event.model_dump_json(exclude_none=True, by_alias=True),
+            }
+        )
+        pending.session_times[key] = event.timestamp
+        if deltas["session"]:
+            pending.session_deltas.setdefault(key, {}).update(deltas["session"])
+        if deltas["user"]:
+            pending.user_deltas.setdefault(key[:2], {}).update(deltas["user"])
+        if deltas["app"]:
+            pending.app_deltas.setdefault(key[0], {}).update(deltas["app"])
+
+        if len(pending.events) >= self._max_batch_events:
+            await self.flush()
+        else:
+            self._schedule_flush()
+        return event
+
+    async def flush(self) -> None:
+        """Writes all buffered events and state deltas in one transaction."""
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, _PendingWrites()
+            self._flushing = batch
+            try:
+                await asyncio.to_thread(self._flush_sync, batch)
+            except Exception:
+                self._pending = batch.merge_into(self._pending)
+                raise
+            finally:
+                self._flushing = None
+
+    async def close(self) -> None:
+        """Flushes outstanding writes and stops the background flusher."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush()
+
+    def _schedule_flush(self) -> None:
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(
+                self._flush_later()
+            )
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self._flush_interval)
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception("Session flush failed; will retry.")
+            self._flush_task = None
+            self._schedule_flush()
+
+    def _remember(self, session: Session, update_time: float) -> _CachedSession:
+        key = (session.app_name, session.user_id, session.id)
+        cached = _CachedSession(session, update_time)
+        self._cache[key] = cached
+        self._cache.move_to_end(key)
+        excess = len(self._cache) - self._cache_size
+        if excess > 0:
+            # Sessions with unflushed writes must stay cached.
+            evictable = [k for k in self._cache if not self._is_unflushed(k)]
+            for old in evictable[:excess]:
+                del self._cache[old]
+        return cached
+
+    def _is_unflushed(self, key: tuple) -> bool:
+        return self._pending.touches(key) or (
+            self._flushing is not None and self._flushing.touches(key)
+        )
+
+    def _forget(self, key: tuple) -> None:
+        self._cache.pop(key, None)
+        if key[:2] not in self._pending.user_deltas:
+            self._user_states.pop(key[:2], None)
+        if key[0] not in self._pending.app_deltas:
+            self._app_states.pop(key[0], None)
+
+    async def _ensure_scoped_state(self, app_name: str, user_id: str) -> None:
+        """Loads the app and user state into memory if they are not cached."""
+        if app_name in self._app_states and (app_name, user_id) in self._user_states:
+            return
+        app_state, user_state = await asyncio.to_thread(
+            self._load_scoped_state_sync, app_name, user_id
+        )
+        self._app_states.setdefault(app_name, app_state)
+        self._user_states.setdefault((app_name, user_id), user_state)
+
+    async def _merged_copy(self, session: Session, copied: bool = False) -> Session:
+        """Returns a copy of `session` with app and user state merged in."""
+        if not copied:
+            session = copy.deepcopy(session)
+        app_name, user_id = session.app_name, session.user_id
+        await self._ensure_scoped_state(app_name, user_id)
+        for k, v in self._app_states[app_name][1].items():
+            session.state[State.APP_PREFIX + k] = copy.deepcopy(v)
+        for k, v in self._user_states[(app_name, user_id)][1].items():
+            session.state[State.USER_PREFIX + k] = copy.deepcopy(v)
+        return session
+
+    def _create_session_sync(
+        self,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        deltas: dict[str, dict[str, Any]],
+        now: float,
+    ) -> bool:
+        with self._engine.begin() as conn:
+            exists = conn.execute(
+                sqlalchemy.select(sessions.c.session_id).where(
+                    sessions.c.app_name == app_name,
+                    sessions.c.user_id == user_id,
+                    sessions.c.session_id == session_id,
+                )
+            ).first()
+            if exists:
+                return False
+            conn.execute(
+                sessions.insert().values(
+                    app_name=app_name,
+                    user_id=user_id,
+                    session_id=session_id,
+                    state=deltas["session"],
+                    create_time=now,
+                    update_time=now,
+                )
+            )
+            if deltas["app"]:
+                self._merge_state_row(conn, app_states, (app_name,), deltas["app"], now)
+            if deltas["user"]:
+                self._merge_state_row(
+                    conn, user_states, (app_name, user_id), deltas["user"], now
+                )
+        return True
+
+    def _is_current_sync(self, key: tuple, update_time: float) -> bool:
+        app_name, user_id, session_id = key
+        with self._engine.connect() as conn:
+            row = conn.execute(
+                sqlalchemy.select(
+                    sqlalchemy.select(sessions.c.update_time)
+                    .where(
+                        sessions.c.app_name == app_name,
+                        sessions.c.user_id == user_id,
+                        sessions.c.session_id == session_id,
+                    )
+                    .scalar_subquery()
+                    .label("session"),
+                    sqlalchemy.select(user_states.c.update_time)
+                    .where(
+                        user_states.c.app_name == app_name,
+                        user_states.c.user_id == user_id,
+                    )
+                    .scalar_subquery()
+                    .label("user"),
+                    sqlalchemy.select(app_states.c.update_time)
+                    .where(app_states.c.app_name == app_name)
+                    .scalar_subquery()
+                    .label("app"),
+                )
+            ).one()
+        user_stamp = self._user_states.get((app_name, user_id), (None,))[0]
+        app_stamp = self._app_states.get(app_name, (None,))[0]
+        return (
+            row.session == update_time
+            and (row.user is None or row.user == user_stamp)
+            and (row.app is None or row.app == app_stamp)
+        )
+
+    def _load_session_sync(self, key: tuple) -> tuple[Session, float] | None:
+        app_name, user_id, session_id = key
+        with self._engine.connect() as conn:
+            row = conn.execute(
+                sqlalchemy.select(sessions).where(
+                    sessions.c.app_name == app_name,
+                    sessions.c.user_id == user_id,
+                    sessions.c.session_id == session_id,
+                )
+            ).first()
+            if row is None:
+                return None
+            payloads = conn.execute(
+                sqlalchemy.select(events.c.payload)
+                .where(
+                    events.c.app_name == app_name,
+                    events.c.user_id == user_id,
+                    events.c.session_id == session_id,
+                )
+                .order_by(events.c.timestamp)
+            ).scalars()
+            session_events = [Event.model_validate_json(p) for p in payloads]
+        session = Session(
+            app_name=app_name,
+            user_id=user_id,
+            id=session_id,
+            state=dict(row.state or {}),
+            events=session_events,
+            last_update_time=row.update_time,
+        )
+        return session, row.update_time
+
+    def _load_scoped_state_sync(
+        self, app_name: str, user_id: str
+    ) -> tuple[tuple[float, dict], tuple[float, dict]]:
+        with self._engine.connect() as conn:
+            app_row = conn.execute(
+                sqlalchemy.select(app_states).where(app_states.c.app_name == app_name)
+            ).first()
+            user_row = conn.execute(
+                sqlalchemy.select(user_states).where(
+                    user_states.c.app_name == app_name,
+                    user_states.c.user_id == user_id,
+                )
+            ).first()
+        app_state = (
+            (app_row.update_time, dict(app_row.state or {})) if app_row else (None, {})
+        )
+        user_state = (
+            (user_row.update_time, dict(user_row.state or {}))
+            if user_row
+            else (None, {})
+        )
+        return app_state, user_state
+
+    def _load_recent_sessions_sync(
+        self, app_name: str, limit: int
+    ) -> tuple[list[tuple[Session, float]], tuple[float, dict], dict]:
+        """Loads the most recent sessions with their events and scoped state."""
+        recent = (
+            sqlalchemy.select(sessions)
+            .where(sessions.c.app_name == app_name)
+            .order_by(sessions.c.update_time.desc())
+            .limit(limit)
+            .subquery()
+        )
+        with self._engine.connect() as conn:
+            rows = conn.execute(
+                sqlalchemy.select(recent).order_by(recent.c.update_time.desc())
+            ).fetchall()
+            payloads = conn.execute(
+                sqlalchemy.select(events.c.user_id, events.c.session_id, events.c.payload)
+                .join(
+                    recent,
+                    sqlalchemy.and_(
+                        events.c.app_name == recent.c.app_name,
+                        events.c.user_id == recent.c.user_id,
+                        events.c.session_id == recent.c.session_id,
+                    ),
+                )
+                .order_by(events.c.timestamp)
+            ).fetchall()
+            app_row = conn.execute(
+                sqlalchemy.select(app_states).where(app_states.c.app_name == app_name)
+            ).first()
+            user_rows = conn.execute(
+                sqlalchemy.select(user_states).where(
+                    user_states.c.app_name == app_name,
+                    user_states.c.user_id.in_({row.user_id for row in rows}),
+                )
+            ).fetchall()
+        session_events = defaultdict(list)
+        for user_id, session_id, payload in payloads:
+            session_events[(user_id, session_id)].append(
+                Event.model_validate_json(payload)
+            )
+        loaded = [
+            (
+                Session(
+                    app_name=app_name,
+                    user_id=row.user_id,
+                    id=row.session_id,
+                    state=dict(row.state or {}),
+                    events=session_events[(row.user_id, row.session_id)],
+                    last_update_time=row.update_time,
+                ),
+                row.update_time,
+            )
+            for row in rows
+        ]
+        app_state = (
+            (app_row.update_time, dict(app_row.state or {})) if app_row else (None, {})
+        )
+        scoped = {row.user_id: (None, {}) for row in rows}
+        for row in user_rows:
+            scoped[row.user_id] = (row.update_time, dict(row.state or {}))
+        return loaded, app_state, scoped
+
+    def _list_sessions_sync(self, app_name: str, user_id: str | None) -> list:
+        query = sqlalchemy.select(sessions).where(sessions.c.app_name == app_name)
+        if user_id is not None:
+            query = query.where(sessions.c.user_id == user_id)
+        with self._engine.connect() as conn:
+            return conn.execute(query).fetchall()
+
+    def _delete_session_sync(self, key: tuple) -> None:
+        app_name, user_id, session_id = key
+        with self._engine.begin() as conn:
+            for table in (events, sessions):
+                conn.execute(
+                    sqlalchemy.delete(table).where(
+                        table.c.app_name == app_name,
+                        table.c.user_id == user_id,
+                        table.c.session_id == session_id,
+                    )
+                )
+
+    def _flush_sync(self, batch: _PendingWrites) -> None:
+        with self._engine.begin() as conn:
+            if batch.events:
+                conn.execute(events.insert(), batch.events)
+            for key, update_time in batch.session_times.items():
+                app_name, user_id, session_id = key
+                where = (
+                    sessions.c.app_name == app_name,
+                    sessions.c.user_id == user_id,
+                    sessions.c.session_id == session_id,
+                )
+                values = {"update_time": update_time}
+                delta = batch.session_deltas.get(key)
+                if delta:
+                    state = conn.execute(
+                        sqlalchemy.select(sessions.c.state)
+                        .where(*where)
+                        .with_for_update()
+                    ).scalar()
+                    values["state"] = {**(state or {}), **delta}
+                conn.execute(sqlalchemy.update(sessions).where(*where).values(**values))
+            for user_key, delta in batch.user_deltas.items():
+                update_time = self._user_states.get(user_key, (time.time(),))[0]
+                self._merge_state_row(conn, user_states, user_key, delta, update_time)
+            for app_name, delta in batch.app_deltas.items():
+                update_time = self._app_states.get(app_name, (time.time(),))[0]
+                self._merge_state_row(conn, app_states, (app_name,), delta, update_time)
+
+    @staticmethod
+    def _merge_state_row(
+        conn: sqlalchemy.engine.base.Connection,
+        table: Table,
+        key: tuple,
+        delta: dict[str, Any],
+        update_time: float,
+    ) -> None:
+        """Merges `delta` into the state row of an app or user, creating it."""
+        columns = zip(table.primary_key, key, strict=True)
+        where = [column == value for column, value in columns]
+        state = conn.execute(
+            sqlalchemy.select(table.c.state).where(*where).with_for_update()
+        ).first()
+        if state is None:
+            values = {
+                c.name: v for c, v in zip(table.primary_key, key, strict=True)
+            }
+            conn.execute(
+                table.insert().values(**values, state=delta, update_time=update_time)
+            )
+        else:
+            conn.execute(
+                sqlalchemy.update(table)
+                .where(*where)
+                .values(state={**(state[0] or {}), **delta}, update_time=update_time)
+            )
@@ -0,0 +1,114 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Merges identical reads that run concurrently into one database query."""
+
+import concurrent.futures
+import os
+import threading
+import time
+
+# Set to 0 to run every read on its own.
+ENABLED = os.environ.get("READ_COALESCING", "1") != "0"
+
+_lock = threading.Lock()
+# In-flight reads by user, then by key.
+_flights: dict[str, dict[tuple, concurrent.futures.Future]] = {}
+_changed = threading.local()
+_stats = {"queries": 0, "coalesced": 0, "invalidated": 0}
+
+
+def run(user_id: str, key: tuple, load, deadline: float | None = None):
+    """
+    Returns the result of `load()`, sharing one call among concurrent callers.
+
+    The first caller for a user and key runs `load`; callers arriving while it
+    runs wait for it, at most until their own deadline, and get the same
+    result, or the same exception. Results are not cached: a caller arriving
+    after the read finished runs a new one.
+
+    Args:
+        user_id: The user whose data `load` reads. Mutations for the user stop
+            later callers from joining reads already in flight.
+        key: Identifies the read, e.g. a name, the engine and the options.
+        load: The read to run.
+        deadline: The caller's `time.monotonic()` deadline, e.g.
+            `resilience.current_deadline()`, or None to wait without one.
+
+    Returns:
+        The value returned by `load`, shared by every caller. Do not mutate it.
+
+    Raises:
+        TimeoutError: If the read joined did not finish by `deadline`.
+    """
+    if not ENABLED:
+        return load()
+    with _lock:
+        flights = _flights.setdefault(user_id, {})
+        future = flights.get(key)
+        leader = future is None
+        if leader:
+            future = flights[key] = concurrent.futures.Future()
+            _stats["queries"] += 1
+        else:
+            _stats["coalesced"] += 1
+    if not leader:
+        timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            raise TimeoutError("The shared read did not finish in time.") from None
+    try:
+        result = load()
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        with _lock:
+            # A mutation may have replaced the flight already.
+            if _flights.get(user_id, {}).get(key) is future:
+                del _flights[user_id][key]
+                if not _flights[user_id]:
+                    del _flights[user_id]
+
+
+def invalidate(user_id: str) -> None:
+    """Makes callers for `user_id` start new reads instead of joining ones in flight."""
+    with _lock:
+        _stats["invalidated"] += len(_flights.pop(user_id, ()))
+
+
+def mark_changed(user_id: str) -> None:
+    """
+    Records that the current thread's transaction changes a user's data.
+
+    Call `invalidate_changed` once the transaction has committed.
+    """
+    if user_id is not None:
+        _changed.__dict__.setdefault("users", set()).add(user_id)
+
+
+def invalidate_changed() -> None:
+    """Invalidates the users marked changed by the current thread."""
+    for user_id in _changed.__dict__.pop("users", ()):
+        invalidate(user_id)
+
+
+def stats() -> dict:
+    with _lock:
+        return {**_stats, "in_flight": sum(len(f) for f in _flights.values())}
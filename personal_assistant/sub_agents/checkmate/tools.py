@@ -0,0 +1,925 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tools for the Checkmate agent to interact with the database."""
+
+import time
+import uuid
+
+import sqlalchemy
+from google.adk.tools import ToolContext
+
+from personal_assistant import (
+    concurrency,
+    database,
+    encoding,
+    resilience,
+    single_flight,
+    write_behind,
+)
+
+# Prefix of the session state keys holding, per user, the last to-do version
+# the agent has seen. Versions are counted per user.
+TODO_VERSION_STATE_KEY = "todo_version"
+
+
+def _todo_version_key(user_id: str) -> str:
+    return f"{TODO_VERSION_STATE_KEY}:{user_id}"
+
+
+def _touch_list(conn: sqlalchemy.engine.base.Connection, list_id: str, version: int):
+    """Stamps a list with the version of a change to one of its tasks."""
+    conn.execute(
+        sqlalchemy.update(database.todolists)
+        .where(database.todolists.c.list_id == list_id)
+        .values(version=version)
+    )
+
+
+@concurrency.reads
+@resilience.resilient(idempotent=True)
+@write_behind.sees_pending_writes
+def get_user_by_name(user_name: str, tool_context: ToolContext) -> dict:
+    """
+    Retrieves a user's ID by their name.
+
+    Args:
+        user_name: The name of the user.
+        tool_context: The tool context.
+
+    Returns:
+        A dictionary containing the user's ID if found, otherwise an empty dictionary.
+    """
+    engine = database.read_engine(tool_context)
+    with engine.connect() as conn:
+        select_user = sqlalchemy.select(database.users).where(
+            database.users.c.user_name == user_name
+        )
+        user = conn.execute(select_user).fetchone()
+    if user:
+        return {"user_id": user.user_id}
+    return {}
+
+@concurrency.writes("user_name")
+@resilience.resilient(idempotent=False)
+def add_user(user_name: str, tool_context: ToolContext) -> dict:
+    """
+    Adds a new user to the database.
+
+    Args:
+        user_name: The name of the user.
+        tool_context: The tool context.
+
+    Returns:
+        A dictionary with the status of the operation and the new user's ID.
+    """
+    user_id = str(uuid.uuid4())
+    pending = write_behind.apply(
+        tool_context, _insert_user, user_id=user_id, user_name=user_name
+    )
+    return {"status": "success", "user_id": user_id, **pending}
+
+
+@write_behind.operation
+def _insert_user(conn: sqlalchemy.engine.base.Connection, user_id: str, user_name: str):
+    conn.execute(database.users.insert().values(user_id=user_id, user_name=user_name))
+    single_flight.mark_changed(user_id)
+
+
+@concurrency.writes("user_name")
+@resilience.resilient(idempotent=False)
+def add_user_and_list(user_name: str, list_name: str, tool_context: ToolContext) -> dict:
+    """
+    Adds a new user (if not exists) and a new to-do list for that user.
+
+    Args:
+        user_name: The name of the user.
+        list_name: The name of the to-do list.
+        tool_context: The tool context.
+
+    Returns:
+        A dictionary with the status of the operation, user_id, and list_id.
+    """
+    user_data = get_user_by_name(user_name, tool_context)
+    if user_data:
+        user_id = user_data["user_id"]
+    else:
+        new_user_data = add_user(user_name, tool_context)
+        user_id = new_user_data["user_id"]
+
+    list_id = str(uuid.uuid4())
+    pending = write_behind.apply(
+        tool_context, _insert_list, user_id=user_id, list_id=list_id, list_name=list_name
+    )
+    return {"status": "success", "user_id": user_id, "list_id": list_id, **pending}
+
+
+@write_behind.operation
+def _insert_list(
+    conn: sqlalchemy.engine.base.Connection, user_id: str, list_id: str, list_name: str
+):
+    version = database.bump_todo_version(conn, user_id=user_id)
+    conn.execute(
+        database.todolists.insert().values(
+            list_id=list_id, user_id=user_id, list_name=list_name, version=version
+        )
+    )
+
+
+@concurrency.writes("list_id", commutes=True)
+@resilience.resilient(idempotent=False)
+def add_task_to_list(list_id: str, task_description: str, tool_context: ToolContext) -> dict:
+    """
+    Adds a new task to a to-do list.
+
+    Args:
+        list_id: The ID of the to-do list.
+        task_description: The description of the task.
+        tool_context: The tool context.
+
+    Returns:
+        A dictionary with the status of the operation.
+    """
+    task_id = str(uuid.uuid4())
+    pending = write_behind.apply(
+        tool_context,
+        _insert_task,
+        list_id=list_id,
+        task_id=task_id,
+        task_description=task_description,
+    )
+    return {"status": "success", "task_id": task_id, **pending}
+
+
+@write_behind.operation
+def _insert_task(
+    conn: sqlalchemy.engine.base.Connection,
+    list_id: str,
+    task_id: str,
+    task_description: str,
+):
+    version = database.bump_todo_version(conn, list_id=list_id)
+    conn.execute(
+        database.tasks.insert().values(
+            task_id=task_id,
+            list_id=list_id,
+            task_description=task_description,
+            is_completed=False,
+            version=version,
+        )
+    )
+    _touch_list(conn, list_id, version)
+
+
+@concurrency.reads
+@resilience.resilient(idempotent=True)
+@write_behind.sees_pending_writes
+def get_todo_list(
+    user_id: str,
+    tool_context: ToolContext,
+    compact: bool = encoding.COMPACT_RESULTS,
+    include_completed: bool | None = None,
+    include_archived: bool = False,
+) -> dict:
+    """
+    Retrieves the to-do list for a user.
+
+    Args:
+        user_id: The ID of the user.
+        tool_context: The tool context.
+        compact: Whether to return the lists in the compact columnar format.
+        include_completed: Whether to include completed tasks. Defaults to
+            True for the verbose format and False for the compact format.
+        include_archived: Whether to also return tasks completed long ago,
+            which are archived, under `archived_tasks`.
+
+    Returns:
+        A dictionary with the to-do list.
+    """
+    if include_completed is None:
+        include_completed = not compact
+    engine = database.read_engine(tool_context)
+    # Identical reads running concurrently, e.g. duplicate calls or several
+    # sessions of the same user, share one query.
+    version, rows, archived = single_flight.run(
+        user_id,
+        ("todo_list", engine, include_completed, include_archived),
+        lambda: _load_todo_list(engine, user_id, include_completed, include_archived),
+        deadline=resilience.current_deadline(),
+    )
+
+    result = {}
+    for row in rows:
+        _, _, tasks = result.setdefault(row.list_id, (row.list_id, row.list_name, []))
+        if row.task_id is not None:
+            tasks.append((row.task_id, row.task_description, row.is_completed))
+
+    if version is not None:
+        tool_context.state[_todo_version_key(user_id)] = version
+    return format_todo_lists(
+        list(result.values()), compact, include_completed, archived
+    )
+
+
+def _load_todo_list(
+    engine: sqlalchemy.engine.base.Engine,
+    user_id: str,
+    include_completed: bool,
+    include_archived: bool,
+) -> tuple:
+    """Reads a user's to-do version, list and task rows, and archived tasks."""
+    with engine.connect() as conn:
+        # Read the version first: changes racing with this read are reported
+        # again by the next `get_todo_changes`, never lost.
+        version = conn.execute(
+            sqlalchemy.select(database.users.c.todo_version).where(
+                database.users.c.user_id == user_id
+            )
+        ).scalar()
+        # One round trip for all lists. Open-task reads join on the same
+        # predicate as the partial index, so completed history is never read.
+        join_on = database.tasks.c.list_id == database.todolists.c.list_id
+        if not include_completed:
+            join_on = sqlalchemy.and_(join_on, database.open_tasks_predicate())
+        select_tasks = (
+            sqlalchemy.select(
+                database.todolists.c.list_id,
+                database.todolists.c.list_name,
+                database.tasks.c.task_id,
+                database.tasks.c.task_description,
+                database.tasks.c.is_completed,
+            )
+            .select_from(database.todolists.outerjoin(database.tasks, join_on))
+            .where(database.todolists.c.user_id == user_id)
+        )
+        rows = conn.execute(select_tasks).fetchall()
+        archived = None
+        if include_archived:
+            archived = conn.execute(
+                sqlalchemy.select(
+                    database.tasks_archive.c.task_id,
+                    database.tasks_archive.c.list_id,
+                    database.tasks_archive.c.task_description,
+                ).where(database.tasks_archive.c.user_id == user_id)
+            ).fetchall()
+    return version, rows, archived
+
+
+@concurrency.reads
+@resilience.resilient(idempotent=True)
+@write_behind.sees_pending_writes
+def get_todo_changes(
+    user_id: str,
+    tool_context: ToolContext,
+    since_version: int | None = None,
+) -> dict:
+    """
+    Retrieves what changed in a user's to-do lists since a given version.
+
+    Use this instead of `get_todo_list` when the lists were already retrieved
+    earlier in the conversation.
+
+    Args:
+        user_id: The ID of the user.
+        tool_context: The tool context.
+        since_version: The version returned by the previous call. Defaults to
+            the last version of this user seen in this session, or 0.
+
+    Returns:
+        A dictionary with the current version, the lists and tasks that were
+        added or changed, and the lists and tasks that were deleted or, with
+        the kind "archived_task", archived.
+    """
+    if since_version is None:
+        since_version = tool_context.state.get(_todo_version_key(user_id), 0)
+    engine = database.read_engine(tool_context)
+
+    with engine.connect() as conn:
+        version = conn.execute(
+            sqlalchemy.select(database.users.c.todo_version).where(
+                database.users.c.user_id == user_id
+            )
+        ).scalar()
+        if version is None:
+            return {}
+        lists = conn.execute(
+            sqlalchemy.select(database.todolists).where(
+                database.todolists.c.user_id == user_id,
+                database.todolists.c.version > since_version,
+            )
+        ).fetchall()
+        tasks = conn.execute(
+            sqlalchemy.select(database.tasks)
+            .join(database.todolists)
+            .where(
+                database.todolists.c.user_id == user_id,
+                database.tasks.c.version > since_version,
+            )
+        ).fetchall()
+        deleted = conn.execute(
+            sqlalchemy.select(database.todo_tombstones).where(
+                database.todo_tombstones.c.user_id == user_id,
+                database.todo_tombstones.c.version > since_version,
+            )
+        ).fetchall()
+
+    tool_context.state[_todo_version_key(user_id)] = version
+    return {
+        "version": version,
+        "since_version": since_version,
+        "changed_lists": [
+            {"list_id": l.list_id, "list_name": l.list_name} for l in lists
+        ],
+        "changed_tasks": [
+            {
+                "task_id": t.task_id,
+                "list_id": t.list_id,
+                "description": t.task_description,
+                "completed": t.is_completed,
+            }
+            for t in tasks
+        ],
+        "deleted": [
+            {"kind": d.kind, "id": d.item_id, "list_id": d.list_id} for d in deleted
+        ],
+    }
+
+
+def format_todo_lists(
+    lists: list[tuple[str, str, list[tuple[str, str, bool]]]],
+    compact: bool,
+    include_completed: bool,
+    archived: list[tuple[str, str, str]] | None = None,
+) -> dict:
+    """
+    Builds the `get_todo_list` result from `(list_id, list_name, tasks)` tuples.
+
+    The verbose format nests every task as a dict under its list. The compact
+    format sends two flat tables, lists and tasks, with their column names
+    once; tasks point at their list by row number rather than repeating its ID,
+    and without completed tasks the `completed` column is dropped.
+
+    Args:
+        lists: The lists, each with its `(task_id, description, completed)`
+            tasks.
+        compact: Whether to use the compact format.
+        include_completed: Whether completed tasks are included. Completed
+            tasks still present in `lists` are filtered out if False.
+        archived: Archived tasks as `(task_id, list_id, description)`, returned
+            under `archived_tasks` if not None.
+
+    Returns:
+        A dictionary with the to-do lists.
+    """
+    if not compact:
+        result = {
+            "todo_lists": [
+                {
+                    "list_id": list_id,
+                    "list_name": list_name,
+                    "tasks": [
+                        {"task_id": t, "description": d, "completed": c}
+                        for t, d, c in tasks
+                        if include_completed or not c
+                    ],
+                }
+                for list_id, list_name, tasks in lists
+            ]
+        }
+        if archived is not None:
+            result["archived_tasks"] = [
+                {"task_id": t, "list_id": l, "description": d} for t, l, d in archived
+            ]
+        return result
+    result = {
+        "todo_lists": encoding.columnar(
+            ["list_id", "list_name"], ((i, n) for i, n, _ in lists)
+        )
+    }
+    # Tasks refer to their list by its row number in `todo_lists`.
+    if include_completed:
+        result["tasks"] = encoding.columnar(
+            ["task_id", "list_row", "description", "completed"],
+            (
+                (t, row, d, c)
+                for row, (_, _, tasks) in enumerate(lists)
+                for t, d, c in tasks
+            ),
+        )
+    else:
+        result["tasks"] = encoding.columnar(
+            ["task_id", "list_row", "description"],
+            (
+                (t, row, d)
+                for row, (_, _, tasks) in enumerate(lists)
+                for t, d, c in tasks
+                if not c
+            ),
+        )
+        result["completed_tasks_omitted"] = True
+    if archived is not None:
+        rows = {list_id: row for row, (list_id, _, _) in enumerate(lists)}
+        result["archived_tasks"] = encoding.columnar(
+            ["task_id", "list_row", "description"],
+            ((t, rows.get(l), d) for t, l, d in archived),
+        )
+    return result
+
+
+def ask_for_confirmation(question: str, tool_context: ToolContext) -> dict:
+    """
+    Asks the user for confirmation before performing an action.
+
+    Args:
+        question: The question to ask the user.
+        tool_context: The tool context.
+
+    Returns:
+        A dictionary with the user's response.
+    """
+    return {"question": question}
+
+
+@concurrency.writes("user_id")
+@resilience.resilient(idempotent=True)
+def update_user_name(user_id: str, new_user_name: str, tool_context: ToolContext) -> dict:
+    """
+    Updates a user's name in the database.
+
+    Args:
+        user_id: The ID of the user to update.
+        new_user_name: The new name for the user.
+        tool_context: The tool context.
+
+    Returns:
+        A dictionary with the status of the operation.
+    """
+    pending = write_behind.apply(
+        tool_context, _rename_user, user_id=user_id, user_name=new_user_name
+    )
+    return {"status": "success", **pending}
+
+
+@write_behind.operation
+def _rename_user(conn: sqlalchemy.engine.base.Connection, user_id: str, user_name: str):
+    conn.execute(
+        sqlalchemy.update(database.users)
+        .where(database.users.c.user_id == user_id)
+        .values(user_name=user_name)
+    )
+    single_flight.mark_changed(user_id)
+
+
+@concurrency.writes("list_id")
+@resilience.resilient(idempotent=True)
+def update_list_name(list_id: str, new_list_name: str, tool_context: ToolContext) -> dict:
+    """
+    Updates a to-do list's name in the database.
+
+    Args:
+        list_id: The ID of the list to update.
+        new_list_name: The new name for the list.
+        tool_context: The tool context.
+
+    Returns:
+        A dictionary with the status of the operation.
+    """
+    pending = write_behind.apply(
+        tool_context, _rename_list, list_id=list_id, list_name=new_list_name
+    )
+    return {"status": "success", **pending}
+
+
+@write_behind.operation
+def _rename_list(conn: sqlalchemy.engine.base.Connection, list_id: str, list_name: str):
+    version = database.bump_todo_version(conn, list_id=list_id)
+    conn.execute(
+        sqlalchemy.update(database.todolists)
+        .where(database.todolists.c.list_id == list_id)
+        .values(list_name=list_name, version=version)
+    )
+
+
+@concurrency.writes()
+@resilience.resilient(idempotent=True)
+def delete_user(user_id: str, tool_context: ToolContext) -> dict:
+    """
+    Deletes a user and all their associated data from the database.
+
+    Args:
+        user_id: The ID of the user to delete.
+        tool_context: The tool context.
+
+    Returns:
+        A dictionary with the status of the operation.
+    """
+    pending = write_behind.apply(tool_context, _delete_user, user_id=user_id)
+    return {"status": "success", **pending}
+
+
+@write_behind.operation
+def _delete_user(conn: sqlalchemy.engine.base.Connection, user_id: str):
+    for table in (
+        database.tasks_archive,
+        database.stashed_urls_archive,
+        database.todo_tombstones,
+    ):
+        conn.execute(sqlalchemy.delete(table).where(table.c.user_id == user_id))
+    # The foreign keys do not cascade, so rows referencing the user go first.
+    conn.execute(
+        sqlalchemy.delete(database.tasks).where(
+            database.tasks.c.list_id.in_(
+                sqlalchemy.select(database.todolists.c.list_id).where(
+                    database.todolists.c.user_id == user_id
+                )
+            )
+        )
+    )
+    for table in (database.todolists, database.stashed_urls):
+        conn.execute(sqlalchemy.delete(table).where(table.c.user_id == user_id))
+    conn.execute(
+        sqlalchemy.delete(database.users).where(database.users.c.user_id == user_id)
+    )
+    single_flight.mark_changed(user_id)
+
+
+@concurrency.writes()
+@resilience.resilient(idempotent=True)
+def delete_list(list_id: str, tool_context: ToolContext) -> dict:
+    """
+    Deletes a to-do list and all its tasks from the database.
+
+    Args:
+        list_id: The ID of the list to delete.
+        tool_context: The tool context.
+
+    Returns:
+        A dictionary with the status of the operation.
+    """
+    pending = write_behind.apply(tool_context, _delete_list, list_id=list_id)
+    return {"status": "success", **pending}
+
+
+@write_behind.operation
+def _delete_list(conn: sqlalchemy.engine.base.Connection, list_id: str):
+    user_id = conn.execute(
+        sqlalchemy.select(database.todolists.c.user_id).where(
+            database.todolists.c.list_id == list_id
+        )
+    ).scalar()
+    if user_id is not None:
+        version = database.bump_todo_version(conn, user_id=user_id)
+        conn.execute(
+            database.todo_tombstones.insert().values(
+                item_id=list_id,
+                user_id=user_id,
+                kind="list",
+                list_id=list_id,
+                version=version,
+            )
+        )
+    conn.execute(
+        sqlalchemy.delete(database.tasks_archive).where(
+            database.tasks_archive.c.list_id == list_id
+        )
+    )
+    # The foreign key does not cascade, so the tasks go first.
+    conn.execute(
+        sqlalchemy.delete(database.tasks).where(database.tasks.c.list_id == list_id)
+    )
+    conn.execute(
+        sqlalchemy.delete(database.todolists).where(
+            database.todolists.c.list_id == list_id
+        )
+    )
+
+class TaskIdsError(ValueError):
+    """Raised by bulk task operations given unknown or other users' tasks."""
+
+    def __init__(self, error_code: str, message: str, **extra):
+        super().__init__(message)
+        self.error_code = error_code
+        self.extra = extra
+
+    def result(self) -> dict:
+        return resilience.error_result(
+            self.error_code, str(self), retryable=False, **self.extra
+        )
+
+
+def _owner_of_tasks(
+    conn: sqlalchemy.engine.base.Connection,
+    task_ids: list[str],
+    deleted_ok: bool = False,
+) -> str:
+    """
+    Returns the user owning all of `task_ids`.
+
+    Args:
+        conn: The connection of the mutating transaction.
+        task_ids: The IDs of the tasks.
+        deleted_ok: Whether tasks already deleted count as the owner's, so
+            that retrying a deletion succeeds.
+
+    Raises:
+        TaskIdsError: If a task does not exist or the tasks belong to
+            several users.
+    """
+    owners = dict(
+        conn.execute(
+            sqlalchemy.select(database.tasks.c.task_id, database.todolists.c.user_id)
+            .join(database.todolists)
+            .where(database.tasks.c.task_id.in_(task_ids))
+        ).all()
+    )
+    missing = [task_id for task_id in task_ids if task_id not in owners]
+    if missing and deleted_ok:
+        tombstones = database.todo_tombstones
+        owners.update(
+            conn.execute(
+                sqlalchemy.select(tombstones.c.item_id, tombstones.c.user_id).where(
+                    tombstones.c.item_id.in_(missing), tombstones.c.kind == "task"
+                )
+            ).all()
+        )
+        missing = [task_id for task_id in missing if task_id not in owners]
+    if missing:
+        raise TaskIdsError(
+            "TASKS_NOT_FOUND",
+            f"{len(missing)} of the tasks do not exist. Nothing was changed.",
+            missing_task_ids=missing,
+        )
+    if len(set(owners.values())) > 1:
+        raise TaskIdsError(
+            "TASKS_OF_SEVERAL_USERS",
+            "The tasks belong to different users. Nothing was changed; change "
+            "one user's tasks at a time.",
+        )
+    return next(iter(owners.values()))
+
+
+def _owned_by(user_id: str):
+    """Matches tasks in the lists of `user_id`."""
+    return database.tasks.c.list_id.in_(
+        sqlalchemy.select(database.todolists.c.list_id).where(
+            database.todolists.c.user_id == user_id
+        )
+    )
+
+
+def _set_tasks_completed(
+    task_ids: list[str], completed: bool, tool_context: ToolContext
+) -> dict:
+    """Marks tasks completed or open with one UPDATE."""
+    if not task_ids:
+        return {"status": "success", "updated": 0}
+    try:
+        result = write_behind.apply(
+            tool_context,
+            _update_completed,
+            task_ids=task_ids,
+            completed=completed,
+            now=time.time(),
+        )
+    except TaskIdsError as e:
+        return e.result()
+    return {"status": "success", **result}
+
+
+@write_behind.operation
+def _update_completed(
+    conn: sqlalchemy.engine.base.Connection,
+    task_ids: list[str],
+    completed: bool,
+    now: float | None = None,
+) -> dict:
+    user_id = _owner_of_tasks(conn, task_ids)
+    version = database.bump_todo_version(conn, user_id=user_id)
+    if completed:
+        # Tasks already completed keep their completion time.
+        completed_at = sqlalchemy.case(
+            (database.tasks.c.is_completed, database.tasks.c.completed_at),
+            else_=now or time.time(),
+        )
+    else:
+        completed_at = None
+    updated = conn.execute(
+        sqlalchemy.update(database.tasks)
+        .where(database.tasks.c.task_id.in_(task_ids), _owned_by(user_id))
+        .values(is_completed=completed, completed_at=completed_at, version=version)
+    ).rowcount
+    _touch_lists_of_tasks(conn, task_ids, version)
+    return {"updated": updated}
+
+
+def _touch_lists_of_tasks(
+    conn: sqlalchemy.engine.base.Connection, task_ids: list[str], version: int
+):
+    """Stamps the lists containing `task_ids` with the version of a change."""
+    conn.execute(
+        sqlalchemy.update(database.todolists)
+        .where(
+            database.todolists.c.list_id.in_(
+                sqlalchemy.select(database.tasks.c.list_id).where(
+                    database.tasks.c.task_id.in_(task_ids)
+                )
+            )
+        )
+        .values(version=version)
+    )
+
+
+@concurrency.writes("task_ids")
+@resilience.resilient(idempotent=True)
+def complete_tasks(task_ids: list[str], tool_context: ToolContext) -> dict:
+    """
+    Marks one or more tasks of the same user as completed.
+
+    Args:
+        task_ids: The IDs of the tasks to complete.
+        tool_context: The tool context.
+
+    Returns:
+        A dictionary with the status of the operation and the number of tasks
+        updated.
+    """
+    return _set_tasks_completed(task_ids, True, tool_context)
+
+
+@concurrency.writes("task_ids")
+@resilience.resilient(idempotent=True)
+def reopen_tasks(task_ids: list[str], tool_context: ToolContext) -> dict:
+    """
+    Marks one or more completed tasks of the same user as open again.
+
+    Args:
+        task_ids: The IDs of the tasks to reopen.
+        tool_context: The tool context.
+
+    Returns:
+        A dictionary with the status of the operation and the number of tasks
+        updated.
+    """
+    return _set_tasks_completed(task_ids, False, tool_context)
+
+
+@concurrency.writes("task_id")
+@resilience.resilient(idempotent=True)
+def update_task(task_id: str, new_task_description: str, tool_context: ToolContext) -> dict:
+    """
+    Updates the description of a task.
+
+    Args:
+        task_id: The ID of the task to update.
+        new_task_description: The new description for the task.
+        tool_context: The tool context.
+
+    Returns:
+        A dictionary with the status of the operation.
+    """
+    pending = write_behind.apply(
+        tool_context,
+        _rename_task,
+        task_id=task_id,
+        task_description=new_task_description,
+    )
+    return {"status": "success", **pending}
+
+
+@write_behind.operation
+def _rename_task(
+    conn: sqlalchemy.engine.base.Connection, task_id: str, task_description: str
+):
+    version = database.bump_todo_version(conn, task_id=task_id)
+    conn.execute(
+        sqlalchemy.update(database.tasks)
+        .where(database.tasks.c.task_id == task_id)
+        .values(task_description=task_description, version=version)
+    )
+    _touch_lists_of_tasks(conn, [task_id], version)
+
+
+def _delete_tasks_where(
+    conn: sqlalchemy.engine.base.Connection, version: int, *where
+) -> int:
+    """Records tombstones for the matching tasks, then deletes them."""
+    matching = (
+        sqlalchemy.select(
+            database.tasks.c.task_id,
+            database.todolists.c.user_id,
+            sqlalchemy.literal("task"),
+            database.tasks.c.list_id,
+            sqlalchemy.literal(version),
+        )
+        .join(database.todolists)
+        .where(*where)
+    )
+    conn.execute(
+        database.todo_tombstones.insert().from_select(
+            ["item_id", "user_id", "kind", "list_id", "version"], matching
+        )
+    )
+    return conn.execute(sqlalchemy.delete(database.tasks).where(*where)).rowcount
+
+
+@concurrency.writes("task_ids")
+@resilience.resilient(idempotent=True)
+def delete_tasks(task_ids: list[str], tool_context: ToolContext) -> dict:
+    """
+    Deletes one or more tasks of the same user.
+
+    Args:
+        task_ids: The IDs of the tasks to delete.
+        tool_context: The tool context.
+
+    Returns:
+        A dictionary with the status of the operation and the number of tasks
+        deleted.
+    """
+    if not task_ids:
+        return {"status": "success", "deleted": 0}
+    try:
+        result = write_behind.apply(tool_context, _delete_tasks, task_ids=task_ids)
+    except TaskIdsError as e:
+        return e.result()
+    return {"status": "success", **result}
+
+
+@write_behind.operation
+def _delete_tasks(conn: sqlalchemy.engine.base.Connection, task_ids: list[str]) -> dict:
+    user_id = _owner_of_tasks(conn, task_ids, deleted_ok=True)
+    version = database.bump_todo_version(conn, user_id=user_id)
+    _touch_lists_of_tasks(conn, task_ids, version)
+    deleted = _delete_tasks_where(
+        conn, version, database.tasks.c.task_id.in_(task_ids), _owned_by(user_id)
+    )
+    return {"deleted": deleted}
+
+
+@concurrency.writes()
+@resilience.resilient(idempotent=True)
+def clear_completed(list_id: str, tool_context: ToolContext) -> dict:
+    """
+    Deletes all completed tasks from a to-do list.
+
+    Args:
+        list_id: The ID of the to-do list.
+        tool_context: The tool context.
+
+    Returns:
+        A dictionary with the status of the operation and the number of tasks
+        deleted.
+    """
+    result = write_behind.apply(tool_context, _clear_completed, list_id=list_id)
+    return {"status": "success", **result}
+
+
+@write_behind.operation
+def _clear_completed(conn: sqlalchemy.engine.base.Connection, list_id: str) -> dict:
+    version = database.bump_todo_version(conn, list_id=list_id)
+    deleted = _delete_tasks_where(
+        conn,
+        version,
+        database.tasks.c.list_id == list_id,
+        database.tasks.c.is_completed,
+    )
+    _touch_list(conn, list_id, version)
+    return {"deleted": deleted}
+
+
+@concurrency.reads
+@resilience.resilient(idempotent=True)
+@write_behind.sees_pending_writes
+def get_list_by_name(user_id: str, list_name: str, tool_context: ToolContext) -> dict:
+    """
+    Retrieves a to-do list's ID by its name for a specific user.
+
+    Args:
+        user_id: The ID of the user.
+        list_name: The name of the to-do list.
+        tool_context: The tool context.
+
+    Returns:
+        A dictionary containing the list's ID if found, otherwise an empty dictionary.
+    """
+    engine = database.read_engine(tool_context)
+    with engine.connect() as conn:
+        select_list = sqlalchemy.select(database.todolists).where(
+            database.todolists.c.user_id == user_id,
+            database.todolists.c.list_name == list_name
+        )
+        lst = conn.execute(select_list).fetchone()
+    if lst:
+        return {"list_id": lst.list_id}
+    return {}
\ No newline at end of file
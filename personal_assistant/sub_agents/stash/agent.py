@@ -16,23 +16,30 @@
 
 from google.adk import Agent
 from google.adk.tools.url_context_tool import UrlContextTool
+from personal_assistant import compaction
+from personal_assistant import concurrency
+from personal_assistant import fake_model
 from . import tools
 from . import prompt
 
 MODEL = "gemini-2.5-pro"
 
 stash_agent = Agent(
-    model=MODEL,
+    model=fake_model.resolve(MODEL),
     name="Stash",
     instruction=prompt.STASH_PROMPT,
-    tools=[
-        tools.stash_url,
-        tools.get_stashed_urls,
-        tools.get_user_by_name,
-        tools.add_user,
-        tools.ask_for_confirmation,
-        tools.update_stashed_url,
-        tools.delete_stashed_url,
-        tools.get_stashed_url_by_url,
-    ],
+    tools=concurrency.concurrent_tools(
+        [
+            tools.stash_url,
+            tools.get_stashed_urls,
+            tools.get_stashed_url_summary,
+            tools.get_user_by_name,
+            tools.add_user,
+            tools.ask_for_confirmation,
+            tools.update_stashed_url,
+            tools.delete_stashed_url,
+            tools.get_stashed_url_by_url,
+        ]
+    ),
+    before_model_callback=compaction.compact_history,
 )
@@ -14,11 +14,20 @@
 
 """Tools for the Stash agent to interact with the database."""
 
+import time
 import uuid
+from typing import Optional
 import sqlalchemy
 from google.adk.tools import ToolContext
+from personal_assistant import concurrency
 from personal_assistant import database
+from personal_assistant import encoding
+from personal_assistant import resilience
+from personal_assistant import single_flight
+from personal_assistant import write_behind
 
+@concurrency.writes("user_id", commutes=True)
+@resilience.resilient(idempotent=False)
 def stash_url(user_id: str, url: str, summary: str, tags: str, tool_context: ToolContext) -> dict:
     """
     Adds a new URL to the user's stash.
@@ -33,53 +42,181 @@ def stash_url(user_id: str, url: str, summary: str, tags: str, tool_context: Too
     Returns:
         A dictionary with the status of the operation.
     """
-    engine = database.connect_with_connector()
     url_id = str(uuid.uuid4())
-
-    with engine.connect() as conn:
-        conn.execute(
-            database.stashed_urls.insert().values(
-                url_id=url_id,
-                user_id=user_id,
-                url=url,
-                summary=summary,
-                tags=tags,
-            )
+    pending = write_behind.apply(
+        tool_context,
+        _insert_url,
+        url_id=url_id,
+        user_id=user_id,
+        url=url,
+        summary=summary,
+        tags=tags,
+        updated_at=time.time(),
+    )
+    return {"status": "success", "url_id": url_id, **pending}
+
+
+@write_behind.operation
+def _insert_url(
+    conn: sqlalchemy.engine.base.Connection,
+    url_id: str,
+    user_id: str,
+    url: str,
+    summary: str,
+    tags: str,
+    updated_at: Optional[float] = None,
+):
+    conn.execute(
+        database.stashed_urls.insert().values(
+            url_id=url_id,
+            user_id=user_id,
+            url=url,
+            summary=summary,
+            tags=tags,
+            updated_at=updated_at,
         )
-        conn.commit()
+    )
+    single_flight.mark_changed(user_id)
 
-    return {"status": "success", "url_id": url_id}
 
-
-def get_stashed_urls(user_id: str, tool_context: ToolContext) -> dict:
+@concurrency.reads
+@resilience.resilient(idempotent=True)
+@write_behind.sees_pending_writes
+def get_stashed_urls(
+    user_id: str,
+    tool_context: ToolContext,
+    compact: bool = encoding.COMPACT_RESULTS,
+    include_archived: bool = False,
+) -> dict:
     """
     Retrieves the stashed URLs for a user.
 
     Args:
         user_id: The ID of the user.
         tool_context: The tool context.
+        compact: Whether to return the URLs in the compact columnar format, with
+            long summaries truncated. Use `get_stashed_url_summary` with the
+            `url_id` of a truncated entry to fetch its full summary.
+        include_archived: Whether to also return URLs archived for not being
+            updated in a long time, under `archived_urls`.
 
     Returns:
         A dictionary with the stashed URLs.
     """
-    engine = database.connect_with_connector()
+    engine = database.read_engine(tool_context)
+    urls, archived = single_flight.run(
+        user_id,
+        ("stashed_urls", engine, include_archived),
+        lambda: _load_stashed_urls(engine, user_id, include_archived),
+        deadline=resilience.current_deadline(),
+    )
+
+    result = format_stashed_urls(urls, compact)
+    if include_archived:
+        formatted = format_stashed_urls(archived, compact)
+        result["archived_urls"] = formatted["stashed_urls"]
+        if "truncated_summaries" in formatted:
+            result.setdefault("truncated_summaries", []).extend(
+                formatted["truncated_summaries"]
+            )
+    return result
+
 
+def _load_stashed_urls(
+    engine: sqlalchemy.engine.base.Engine, user_id: str, include_archived: bool
+) -> tuple:
+    """Reads a user's stashed URL rows, and archived ones if requested."""
     with engine.connect() as conn:
         select_urls = sqlalchemy.select(database.stashed_urls).where(
             database.stashed_urls.c.user_id == user_id
         )
         urls = conn.execute(select_urls).fetchall()
-        
-        result = [
-            {
-                "url": u.url,
-                "summary": u.summary,
-                "tags": u.tags,
-            }
-            for u in urls
-        ]
-
-    return {"stashed_urls": result}
+        archived = None
+        if include_archived:
+            archived = conn.execute(
+                sqlalchemy.select(database.stashed_urls_archive).where(
+                    database.stashed_urls_archive.c.user_id == user_id
+                )
+            ).fetchall()
+    return urls, archived
+
+
+def format_stashed_urls(urls: list, compact: bool) -> dict:
+    """
+    Builds the `get_stashed_urls` result from `stashed_urls` rows.
+
+    The compact format sends column names once and truncates summaries to
+    `encoding.SUMMARY_PREVIEW_CHARS`; the `url_id` column is the handle for
+    fetching a truncated summary in full.
+
+    Args:
+        urls: Rows with `url_id`, `url`, `summary` and `tags`.
+        compact: Whether to use the compact format.
+
+    Returns:
+        A dictionary with the stashed URLs.
+    """
+    if not compact:
+        return {
+            "stashed_urls": [
+                {
+                    "url": u.url,
+                    "summary": u.summary,
+                    "tags": u.tags,
+                }
+                for u in urls
+            ]
+        }
+    rows = []
+    truncated = []
+    for u in urls:
+        summary, was_truncated = encoding.truncate(u.summary)
+        if was_truncated:
+            truncated.append(u.url_id)
+        rows.append((u.url_id, u.url, summary, u.tags))
+    result = {
+        "stashed_urls": encoding.columnar(["url_id", "url", "summary", "tags"], rows)
+    }
+    if truncated:
+        result["truncated_summaries"] = truncated
+    return result
+
+
+@concurrency.reads
+@resilience.resilient(idempotent=True)
+@write_behind.sees_pending_writes
+def get_stashed_url_summary(
+    url_id: str, tool_context: ToolContext, include_archived: bool = True
+) -> dict:
+    """
+    Retrieves the full summary of a stashed URL.
+
+    Args:
+        url_id: The ID of the stashed URL.
+        tool_context: The tool context.
+        include_archived: Whether to also look for the URL among archived ones.
+
+    Returns:
+        A dictionary with the URL and its full summary, or an empty dictionary
+        if it does not exist.
+    """
+    engine = database.read_engine(tool_context)
+    tables = [database.stashed_urls]
+    if include_archived:
+        tables.append(database.stashed_urls_archive)
+    with engine.connect() as conn:
+        select_url = sqlalchemy.union_all(
+            *(
+                sqlalchemy.select(table.c.url, table.c.summary).where(
+                    table.c.url_id == url_id
+                )
+                for table in tables
+            )
+        )
+        url_obj = conn.execute(select_url).fetchone()
+    if url_obj:
+        return {"url": url_obj.url, "summary": url_obj.summary}
+    return {}
 
 def ask_for_confirmation(question: str, tool_context: ToolContext) -> dict:
     """
@@ -94,6 +231,8 @@ def ask_for_confirmation(question: str, tool_context: ToolContext) -> dict:
     """
     return {"question": question}
 
+@concurrency.writes("user_name")
+@resilience.resilient(idempotent=False)
 def add_user(user_name: str, tool_context: ToolContext) -> dict:
     """
     Adds a new user.
@@ -105,17 +244,22 @@ def add_user(user_name: str, tool_context: ToolContext) -> dict:
     Returns:
         A dictionary with the status of the operation.
     """
-    engine = database.connect_with_connector()
     user_id = str(uuid.uuid4())
+    pending = write_behind.apply(
+        tool_context, _insert_user, user_id=user_id, user_name=user_name
+    )
+    return {"status": "success", "user_id": user_id, **pending}
 
-    with engine.connect() as conn:
-        conn.execute(
-            database.users.insert().values(user_id=user_id, user_name=user_name)
-        )
-        conn.commit()
 
-    return {"status": "success", "user_id": user_id}
+@write_behind.operation
+def _insert_user(conn: sqlalchemy.engine.base.Connection, user_id: str, user_name: str):
+    conn.execute(database.users.insert().values(user_id=user_id, user_name=user_name))
+    single_flight.mark_changed(user_id)
+
 
+@concurrency.reads
+@resilience.resilient(idempotent=True)
+@write_behind.sees_pending_writes
 def get_user_by_name(user_name: str, tool_context: ToolContext) -> dict:
     """
     Retrieves a user's ID by their name.
@@ -127,7 +271,7 @@ def get_user_by_name(user_name: str, tool_context: ToolContext) -> dict:
     Returns:
         A dictionary containing the user's ID if found, otherwise an empty dictionary.
     """
-    engine = database.connect_with_connector()
+    engine = database.read_engine(tool_context)
     with engine.connect() as conn:
         select_user = sqlalchemy.select(database.users).where(
             database.users.c.user_name == user_name
@@ -138,6 +282,12 @@ def get_user_by_name(user_name: str, tool_context: ToolContext) -> dict:
     return {}
 
 
+class UrlNotFoundError(LookupError):
+    """Raised when a stashed URL to change is neither stashed nor archived."""
+
+
+@concurrency.writes("url_id")
+@resilience.resilient(idempotent=True)
 def update_stashed_url(
     url_id: str,
     new_url: str,
@@ -156,9 +306,10 @@ def update_stashed_url(
         tool_context: The tool context.
 
     Returns:
-        A dictionary with the status of the operation.
+        A dictionary with the status of the operation. An archived URL is
+        moved back out of the archive first; an unknown one gets a
+        `URL_NOT_FOUND` error.
     """
-    engine = database.connect_with_connector()
     values = {}
     if new_url:
         values["url"] = new_url
@@ -167,18 +318,62 @@ def update_stashed_url(
     if new_tags:
         values["tags"] = new_tags
 
-    with engine.connect() as conn:
-        update_stmt = (
-            sqlalchemy.update(database.stashed_urls)
-            .where(database.stashed_urls.c.url_id == url_id)
-            .values(**values)
+    values["updated_at"] = time.time()
+    try:
+        pending = write_behind.apply(
+            tool_context, _update_url, url_id=url_id, values=values
+        )
+    except UrlNotFoundError as e:
+        return resilience.error_result(
+            "URL_NOT_FOUND", str(e), retryable=False, url_id=url_id
         )
-        conn.execute(update_stmt)
-        conn.commit()
+    return {"status": "success", **pending}
+
+
+@write_behind.operation
+def _update_url(conn: sqlalchemy.engine.base.Connection, url_id: str, values: dict):
+    urls = database.stashed_urls
+    update = (
+        sqlalchemy.update(urls)
+        .where(urls.c.url_id == url_id)
+        .values(**values)
+        .returning(urls.c.user_id)
+    )
+    user_id = conn.execute(update).scalar()
+    if user_id is None and _unarchive_url(conn, url_id):
+        user_id = conn.execute(update).scalar()
+    if user_id is None:
+        raise UrlNotFoundError(f"No stashed URL has the ID {url_id}.")
+    single_flight.mark_changed(user_id)
+
+
+def _unarchive_url(conn: sqlalchemy.engine.base.Connection, url_id: str) -> bool:
+    """
+    Moves an archived URL back into `stashed_urls`, since it is in use again.
 
-    return {"status": "success"}
+    Args:
+        conn: The connection of the running transaction.
+        url_id: The ID of the URL.
+
+    Returns:
+        Whether the URL was archived.
+    """
+    urls, archive = database.stashed_urls, database.stashed_urls_archive
+    columns = [column.name for column in urls.columns]
+    moved = conn.execute(
+        urls.insert().from_select(
+            columns,
+            sqlalchemy.select(*(archive.c[name] for name in columns)).where(
+                archive.c.url_id == url_id
+            ),
+        )
+    ).rowcount
+    conn.execute(sqlalchemy.delete(archive).where(archive.c.url_id == url_id))
+    return moved > 0
 
 
+@concurrency.writes("url_id")
+@resilience.resilient(idempotent=True)
 def delete_stashed_url(url_id: str, tool_context: ToolContext) -> dict:
     """
     Deletes a stashed URL.
@@ -190,19 +385,27 @@ def delete_stashed_url(url_id: str, tool_context: ToolContext) -> dict:
     Returns:
         A dictionary with the status of the operation.
     """
-    engine = database.connect_with_connector()
-
-    with engine.connect() as conn:
-        delete_stmt = sqlalchemy.delete(database.stashed_urls).where(
-            database.stashed_urls.c.url_id == url_id
-        )
-        conn.execute(delete_stmt)
-        conn.commit()
-
-    return {"status": "success"}
-
-
-def get_stashed_url_by_url(user_id: str, url: str, tool_context: ToolContext) -> dict:
+    pending = write_behind.apply(tool_context, _delete_url, url_id=url_id)
+    return {"status": "success", **pending}
+
+
+@write_behind.operation
+def _delete_url(conn: sqlalchemy.engine.base.Connection, url_id: str):
+    for table in (database.stashed_urls, database.stashed_urls_archive):
+        user_id = conn.execute(
+            sqlalchemy.delete(table)
+            .where(table.c.url_id == url_id)
+            .returning(table.c.user_id)
+        ).scalar()
+        single_flight.mark_changed(user_id)
+
+
+@concurrency.reads
+@resilience.resilient(idempotent=True)
+@write_behind.sees_pending_writes
+def get_stashed_url_by_url(
+    user_id: str, url: str, tool_context: ToolContext, include_archived: bool = False
+) -> dict:
     """
     Retrieves a stashed URL by its URL for a specific user.
 
@@ -210,17 +413,28 @@ def get_stashed_url_by_url(user_id: str, url: str, tool_context: ToolContext) ->
         user_id: The ID of the user.
         url: The URL to retrieve.
         tool_context: The tool context.
+        include_archived: Whether to also look for the URL among archived ones.
 
     Returns:
-        A dictionary containing the URL's ID if found, otherwise an empty dictionary.
+        A dictionary containing the URL's ID if found, with `archived` set for
+        an archived URL, otherwise an empty dictionary.
     """
-    engine = database.connect_with_connector()
+    engine = database.read_engine(tool_context)
     with engine.connect() as conn:
         select_url = sqlalchemy.select(database.stashed_urls).where(
             database.stashed_urls.c.user_id == user_id,
             database.stashed_urls.c.url == url,
         )
         url_obj = conn.execute(select_url).fetchone()
+        if not url_obj and include_archived:
+            archive = database.stashed_urls_archive
+            url_obj = conn.execute(
+                sqlalchemy.select(archive).where(
+                    archive.c.user_id == user_id, archive.c.url == url
+                )
+            ).fetchone()
+            if url_obj:
+                return {"url_id": url_obj.url_id, "archived": True}
     if url_obj:
         return {"url_id": url_obj.url_id}
     return {}
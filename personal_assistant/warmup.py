@@ -0,0 +1,233 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Warms up a fresh process before it serves its first request.
+
+A new instance otherwise pays, on its first requests, for the Cloud SQL
+connector's certificate fetch and TLS handshakes, SQLAlchemy compiling each
+tool statement, loading sessions and building the agents' tool declarations.
+`warm_up` does that work up front:
+
+- opens `WARMUP_CONNECTIONS` pooled connections per engine, in parallel;
+- calls every read tool once, through ADK's `FunctionTool`, with IDs that
+  match nothing, so their statements are compiled and cached;
+- runs every write-behind operation in a read-only transaction in which its
+  writes are only EXPLAINed, which compiles and plans the mutation statements
+  without executing them;
+- loads the `WARMUP_SESSIONS` most recently updated sessions into the
+  session cache;
+- builds the agents' tool declarations and model clients.
+"""
+
+import asyncio
+import concurrent.futures
+import inspect
+import logging
+import os
+import re
+import time
+import types
+import typing
+
+import sqlalchemy
+from google.adk.models.google_llm import Gemini
+from google.adk.runners import Runner
+
+from personal_assistant import concurrency, database, single_flight, write_behind
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.environ.get("WARMUP", "1") != "0"
+CONNECTIONS = int(os.environ.get("WARMUP_CONNECTIONS", str(min(4, database.POOL_SIZE))))
+SESSIONS = int(os.environ.get("WARMUP_SESSIONS", "100"))
+
+# Matches no row; used for every ID argument.
+_WARMUP_ID = "00000000-0000-0000-0000-000000000000"
+# Statements that write or lock rows, which the warm-up only EXPLAINs.
+_WRITE = re.compile(
+    r"^\s*(INSERT|UPDATE|DELETE|WITH)\b|\bFOR (NO KEY )?(UPDATE|SHARE)\b",
+    re.IGNORECASE,
+)
+_LOCK_TIMEOUT_MS = 1000
+
+
+class _WarmUpContext:
+    """The part of `ToolContext` the tools use."""
+
+    def __init__(self):
+        self.state = {}
+        self.session = types.SimpleNamespace(id="warm-up")
+        self.invocation_id = "warm-up"
+        self.function_call_id = None
+        self.tool_confirmation = None
+
+
+def _dummy_args(func, skip: int = 0) -> dict:
+    """Builds values for the required arguments of `func` from their types."""
+    args = {}
+    params = list(inspect.signature(func).parameters.values())[skip:]
+    for param in params:
+        if param.default is not param.empty or param.name == "tool_context":
+            continue
+        origin = typing.get_origin(param.annotation) or param.annotation
+        if origin is list:
+            args[param.name] = [_WARMUP_ID]
+        elif origin is dict:
+            args[param.name] = {}
+        elif origin is bool:
+            args[param.name] = False
+        elif origin in (int, float):
+            args[param.name] = 0
+        else:
+            args[param.name] = _WARMUP_ID
+    return args
+
+
+def _open_connections(engine, count: int) -> int:
+    """Opens `count` connections at once and returns them to the pool."""
+    with concurrent.futures.ThreadPoolExecutor(count) as executor:
+        connections = list(executor.map(lambda _: engine.connect(), range(count)))
+    for conn in connections:
+        conn.close()
+    return count
+
+
+def _explain_writes(conn, cursor, statement, parameters, context, executemany):
+    """Sends writes and locking reads as EXPLAIN, which does not run them."""
+    if _WRITE.search(statement):
+        statement = f"EXPLAIN {statement}"
+    return statement, parameters
+
+
+def _run_operations() -> int:
+    """
+    Runs each write-behind operation with its writes EXPLAINed, in a read-only
+    transaction that is rolled back.
+
+    The operations see plans instead of the rows their writes would return, so
+    most stop early with an error, after their first statements are compiled.
+    """
+    ran = 0
+    with database.get_engine().connect() as conn:
+        transaction = conn.begin()
+        if conn.dialect.name == "postgresql":
+            conn.exec_driver_sql("SET TRANSACTION READ ONLY")
+            # Planning a write waits for locks that a migration may hold.
+            conn.exec_driver_sql(f"SET LOCAL lock_timeout = {_LOCK_TIMEOUT_MS}")
+        sqlalchemy.event.listen(
+            conn, "before_cursor_execute", _explain_writes, retval=True
+        )
+        try:
+            for op in write_behind.operations():
+                savepoint = conn.begin_nested()
+                try:
+                    op(conn, **_dummy_args(op, skip=1))
+                    ran += 1
+                except Exception as e:
+                    # Statements sent before the error are compiled.
+                    logger.debug("Warm-up of %s failed: %s", op.__name__, e)
+                finally:
+                    savepoint.rollback()
+        finally:
+            sqlalchemy.event.remove(conn, "before_cursor_execute", _explain_writes)
+            transaction.rollback()
+            single_flight.invalidate_changed()
+    return ran
+
+
+def _agents(agent):
+    yield agent
+    for sub_agent in agent.sub_agents:
+        yield from _agents(sub_agent)
+
+
+async def _warm_agents(root_agent) -> tuple[int, list]:
+    """Builds tool declarations and model clients; returns the read tools."""
+    declarations, read_tools = 0, []
+    for agent in _agents(root_agent):
+        model = getattr(agent, "canonical_model", None)
+        if isinstance(model, Gemini):
+            try:
+                _ = model.api_client
+            except Exception as e:
+                logger.warning("Could not create the %s client: %s", model.model, e)
+        for tool in await agent.canonical_tools():
+            if tool._get_declaration() is not None:
+                declarations += 1
+            func = getattr(tool, "func", None)
+            if getattr(func, "call_scope", (None,))[0] == concurrency.READ:
+                read_tools.append(tool)
+    return declarations, read_tools
+
+
+async def warm_up(runner: Runner) -> dict:
+    """
+    Warms up the database pools, statement cache, session cache and agents.
+
+    Failures are logged rather than raised: a database that is down at
+    startup shows up in the readiness probe instead.
+
+    Args:
+        runner: The runner that will serve requests.
+
+    Returns:
+        What was warmed up and how long each step took, in ms.
+    """
+    report = {}
+
+    async def step(name: str, work):
+        start = time.perf_counter()
+        try:
+            report[name] = await work()
+        except Exception as e:
+            logger.warning("Warm-up step %s failed: %s", name, e)
+            report[name] = None
+        report[f"{name}_ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+    async def connections():
+        engines = [database.get_engine(), *database.get_replica_engines()]
+        counts = await asyncio.gather(
+            *(asyncio.to_thread(_open_connections, e, CONNECTIONS) for e in engines)
+        )
+        return sum(counts)
+
+    read_tools = []
+
+    async def agents():
+        declarations, tools = await _warm_agents(runner.agent)
+        read_tools.extend(tools)
+        return declarations
+
+    async def reads():
+        context = _WarmUpContext()
+        for tool in read_tools:
+            await tool.run_async(args=_dummy_args(tool.func), tool_context=context)
+        return len(read_tools)
+
+    async def sessions():
+        service = runner.session_service
+        if not hasattr(service, "preload"):
+            return 0
+        return await service.preload(app_name=runner.app_name, limit=SESSIONS)
+
+    start = time.perf_counter()
+    await step("connections", connections)
+    await step("agents", agents)
+    await step("reads", reads)
+    await step("operations", lambda: asyncio.to_thread(_run_operations))
+    await step("sessions", sessions)
+    report["total_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    logger.info("Warm-up done: %s", report)
+    return report
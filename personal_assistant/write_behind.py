@@ -0,0 +1,619 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Write-behind mode: mutations are journaled locally and applied later."""
+
+import atexit
+import collections
+import fcntl
+import functools
+import glob
+import importlib
+import inspect
+import itertools
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+
+import sqlalchemy
+
+from personal_assistant import database, resilience, single_flight
+
+logger = logging.getLogger(__name__)
+
+# Path of the local journal. Write-behind mode is on when it is set. Each
+# process needs its own journal; server workers number theirs, see `start`.
+JOURNAL_PATH = os.environ.get("WRITE_BEHIND_JOURNAL")
+ENABLED = bool(JOURNAL_PATH)
+# How long the flusher waits to gather a batch, and the largest batch it
+# applies in one transaction.
+FLUSH_INTERVAL_SECONDS = float(os.environ.get("WRITE_BEHIND_FLUSH_MS", "50")) / 1000
+MAX_BATCH_OPS = int(os.environ.get("WRITE_BEHIND_MAX_BATCH", "100"))
+# Unapplied operations beyond which mutations wait for the flusher.
+MAX_PENDING_OPS = int(os.environ.get("WRITE_BEHIND_MAX_PENDING", "10000"))
+RETRY_MAX_SECONDS = 5.0
+# How long `write_behind_ops` rows are kept to deduplicate replays.
+APPLIED_RETENTION_SECONDS = 24 * 3600
+
+_operations = {}
+
+
+def operation(func):
+    """
+    Registers `func(conn, **args)` as an operation that can be journaled.
+
+    Operations run inside the caller's transaction and must not commit. Their
+    arguments must be JSON-serializable, and IDs of new rows must be passed in
+    rather than generated, so that a replayed operation writes the same rows.
+    """
+    func.op_name = f"{func.__module__}:{func.__qualname__}"
+    _operations[func.op_name] = func
+    return func
+
+
+def operations() -> list:
+    """Returns the registered operations."""
+    return list(_operations.values())
+
+
+def _resolve(op_name: str):
+    """Returns a registered operation, importing its module if needed."""
+    if op_name not in _operations:
+        importlib.import_module(op_name.partition(":")[0])
+    return _operations[op_name]
+
+
+class Journal:
+    """An append-only file of JSON records, fsync'd before appends return."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "a+b")
+        try:
+            fcntl.flock(self._file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError as err:
+            self._file.close()
+            raise RuntimeError(
+                f"Journal {path} is in use by another process."
+            ) from err
+        # Ends a record torn by a crash so that later appends stay readable.
+        self._file.seek(0, os.SEEK_END)
+        if self._file.tell():
+            self._file.seek(-1, os.SEEK_END)
+            if self._file.read(1) != b"\n":
+                self.append([], sync=True, raw=b"\n")
+
+    def read(self) -> list[dict]:
+        """Returns the records, skipping any torn by a crash."""
+        self._file.seek(0)
+        records = []
+        for line in self._file.read().splitlines():
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                logger.warning("Skipping torn record in %s.", self.path)
+        return records
+
+    def append(self, records: list[dict], sync: bool = True, raw: bytes = b""):
+        data = raw + b"".join(
+            json.dumps(r, separators=(",", ":")).encode() + b"\n" for r in records
+        )
+        self._file.write(data)
+        self._file.flush()
+        if sync:
+            os.fsync(self._file.fileno())
+
+    def reset(self):
+        """Empties the journal once every operation in it was applied."""
+        self._file.truncate(0)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+class WriteBehindQueue:
+    """
+    Applies journaled operations to the database in order, in batches.
+
+    Operations are appended to the journal before `submit` returns, and a
+    background thread applies them in batched transactions. Each transaction
+    also records the IDs of the operations it applies in `write_behind_ops`,
+    so operations recovered from the journal after a crash, or retried after
+    an ambiguous commit, are applied exactly once.
+
+    An operation failing with a non-transient error, e.g. a constraint
+    violation, is dropped and reported to its caller by `wait_for`; the rest
+    of its batch is applied. Transient errors, schema errors such as a table
+    not migrated yet, and errors outside the operations are retried with the
+    batch kept in the journal, so an acknowledged write is never lost.
+    """
+
+    def __init__(self, journal: Journal):
+        self._journal = journal
+        self._cond = threading.Condition()
+        # (seq, caller, record, recovered) for every unapplied operation.
+        self._pending = collections.deque()
+        self._seq = 0
+        self._applied_seq = 0
+        self._caller_seq = {}
+        self._failures = {}
+        self._urgent = False
+        self._closed = False
+        self._last_prune = 0.0
+        self._last_error = None
+        self._recover()
+        self._thread = threading.Thread(
+            target=self._run, name="write-behind", daemon=True
+        )
+        self._thread.start()
+
+    def _recover(self):
+        """Queues the operations the journal has not acknowledged."""
+        records = self._journal.read()
+        acked = {op_id for r in records for op_id in r.get("ack", ())}
+        for record in records:
+            if "op_id" in record and record["op_id"] not in acked:
+                self._seq += 1
+                self._pending.append((self._seq, None, record, True))
+        if self._pending:
+            logger.info("Replaying %d journaled operations.", len(self._pending))
+        elif records:
+            self._journal.reset()
+
+    def submit(self, caller, op, args: dict, timeout: float) -> None:
+        """
+        Journals an operation and queues it for the flusher.
+
+        Args:
+            caller: The key `wait_for` uses to find the caller's operations.
+            op: A function registered with `operation`.
+            args: The keyword arguments of `op`.
+            timeout: How long to wait if `MAX_PENDING_OPS` are pending.
+
+        Raises:
+            TimeoutError: If the queue stayed full for `timeout` seconds.
+        """
+        record = {"op_id": str(uuid.uuid4()), "op": op.op_name, "args": args}
+        with self._cond:
+            if not self._cond.wait_for(
+                lambda: len(self._pending) < MAX_PENDING_OPS, timeout
+            ):
+                raise TimeoutError("Too many writes are waiting for the database.")
+            # Appending under the lock keeps the journal in queue order.
+            self._journal.append([record])
+            self._seq += 1
+            self._pending.append((self._seq, caller, record, False))
+            self._caller_seq[caller] = self._seq
+            self._cond.notify_all()
+
+    def wait_for(self, caller, timeout: float) -> tuple[bool, list[dict]]:
+        """
+        Waits until the caller's submitted operations are applied.
+
+        Args:
+            caller: The key the operations were submitted with.
+            timeout: How long to wait.
+
+        Returns:
+            Whether the caller had pending operations, and the caller's failed
+            operations not reported before.
+
+        Raises:
+            TimeoutError: If the operations were not applied in time.
+        """
+        with self._cond:
+            target = self._caller_seq.get(caller, 0)
+            waited = self._applied_seq < target
+            if waited:
+                self._urgent = True
+                self._cond.notify_all()
+                self._cond.wait_for(
+                    lambda: self._applied_seq >= target
+                    or not self._thread.is_alive(),
+                    timeout,
+                )
+                if self._applied_seq < target:
+                    raise TimeoutError("Pending writes were not applied in time.")
+            return waited, self._failures.pop(caller, [])
+
+    def wait_until_empty(self, timeout: float) -> bool:
+        """Waits until every queued operation is applied; returns whether it was."""
+        with self._cond:
+            self._urgent = True
+            self._cond.notify_all()
+            self._cond.wait_for(
+                lambda: not self._pending or not self._thread.is_alive(), timeout
+            )
+            return not self._pending
+
+    def close(self, timeout: float = 10.0) -> None:
+        """
+        Applies the queued operations, waiting at most `timeout` seconds.
+
+        Operations still unapplied stay in the journal for the next start.
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        if not self._thread.is_alive():
+            self._journal.close()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "pending": len(self._pending),
+                "applied_seq": self._applied_seq,
+                "failed_callers": len(self._failures),
+                "flusher_alive": self._thread.is_alive() or self._closed,
+                "last_error": self._last_error,
+            }
+
+    def _run(self):
+        try:
+            self._flush()
+        except BaseException as e:
+            logger.exception("The write-behind flusher stopped.")
+            with self._cond:
+                self._last_error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            # Wakes readers waiting for writes that will not be applied now.
+            with self._cond:
+                self._cond.notify_all()
+
+    def _flush(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or self._closed)
+                if not self._pending:
+                    return
+                if not (self._urgent or self._closed):
+                    self._cond.wait_for(
+                        lambda: self._urgent
+                        or self._closed
+                        or len(self._pending) >= MAX_BATCH_OPS,
+                        FLUSH_INTERVAL_SECONDS,
+                    )
+                self._urgent = False
+                batch = list(itertools.islice(self._pending, MAX_BATCH_OPS))
+            failures = self._apply_with_retries(batch)
+            # Before waiters are woken, so that their reads see the batch.
+            single_flight.invalidate_changed()
+            if failures is None:
+                return
+            with self._cond:
+                for _ in batch:
+                    self._pending.popleft()
+                self._applied_seq = batch[-1][0]
+                for _, caller, record, _ in batch:
+                    if record["op_id"] in failures:
+                        self._failures.setdefault(caller, []).append(
+                            failures[record["op_id"]]
+                        )
+                    if self._caller_seq.get(caller, 0) <= self._applied_seq:
+                        self._caller_seq.pop(caller, None)
+                if self._pending:
+                    # Acknowledgements only save replay work and need no fsync.
+                    self._journal.append(
+                        [{"ack": [record["op_id"] for _, _, record, _ in batch]}],
+                        sync=False,
+                    )
+                else:
+                    self._journal.reset()
+                self._cond.notify_all()
+            self._prune()
+
+    def _apply_with_retries(self, batch) -> dict:
+        """
+        Applies a batch, retrying every error but those of single operations
+        until the queue closes.
+
+        Returns:
+            The failed operations by op ID, or None if the queue was closed
+            before the batch could be applied.
+        """
+        attempt = 0
+        while True:
+            trial = None
+            try:
+                trial = resilience.breaker.before_call()
+                # After a failed attempt the commit may have gone through.
+                failures = self._apply(batch, check_applied=attempt > 0)
+            except Exception as e:
+                if resilience.is_transient(e):
+                    resilience.breaker.record_failure()
+                with self._cond:
+                    self._last_error = f"{type(e).__name__}: {e}"
+                    if self._closed:
+                        logger.warning(
+                            "Leaving %d operations in the journal: %s",
+                            len(self._pending),
+                            e,
+                        )
+                        return None
+                attempt += 1
+                delay = min(RETRY_MAX_SECONDS, 0.1 * 2**attempt)
+                logger.warning(
+                    "Write-behind flush failed, retrying in %.1fs: %r", delay, e
+                )
+                time.sleep(delay)
+            else:
+                resilience.breaker.record_success()
+                return failures
+            finally:
+                resilience.breaker.end_trial(trial)
+
+    def _apply(self, batch, check_applied: bool) -> dict:
+        records = [record for _, _, record, _ in batch]
+        with database.get_engine().connect() as conn:
+            if check_applied or any(recovered for *_, recovered in batch):
+                applied = set(
+                    conn.execute(
+                        sqlalchemy.select(database.write_behind_ops.c.op_id).where(
+                            database.write_behind_ops.c.op_id.in_(
+                                [r["op_id"] for r in records]
+                            )
+                        )
+                    ).scalars()
+                )
+                records = [r for r in records if r["op_id"] not in applied]
+            if not records:
+                return {}
+            try:
+                self._apply_records(conn, records)
+                conn.commit()
+                return {}
+            except Exception as e:
+                conn.rollback()
+                if _retry_later(e):
+                    raise
+            # An operation failed: apply them one per transaction to drop only
+            # the failing ones. A transient error here retries the batch, and
+            # the operations committed so far are then skipped.
+            failures = {}
+            for record in records:
+                try:
+                    self._apply_records(conn, [record])
+                    conn.commit()
+                except Exception as e:
+                    conn.rollback()
+                    if _retry_later(e):
+                        raise
+                    logger.error("Dropping write-behind operation %s: %s", record, e)
+                    failures[record["op_id"]] = _failure(record, e)
+            return failures
+
+    def _apply_records(self, conn, records: list[dict]):
+        now = time.time()
+        conn.execute(
+            database.write_behind_ops.insert(),
+            [{"op_id": r["op_id"], "applied_at": now} for r in records],
+        )
+        for record in records:
+            _resolve(record["op"])(conn, **record["args"])
+
+    def _prune(self):
+        """Deletes old `write_behind_ops` rows, at most once an hour."""
+        now = time.time()
+        if now - self._last_prune < 3600:
+            return
+        self._last_prune = now
+        try:
+            with database.get_engine().begin() as conn:
+                conn.execute(
+                    sqlalchemy.delete(database.write_behind_ops).where(
+                        database.write_behind_ops.c.applied_at
+                        < now - APPLIED_RETENTION_SECONDS
+                    )
+                )
+        except Exception as e:
+            logger.warning("Could not prune write_behind_ops: %s", e)
+
+
+def _retry_later(error: Exception) -> bool:
+    """
+    Whether a batch failing with `error` must be kept and retried: the error
+    is transient or, like a missing table, fixed by migrating the schema.
+    """
+    return resilience.is_transient(error) or isinstance(
+        error, sqlalchemy.exc.ProgrammingError
+    )
+
+
+def _failure(record: dict, error: Exception) -> dict:
+    """Describes a dropped operation to the caller that submitted it."""
+    return {
+        "operation": record["op"].partition(":")[2].lstrip("_"),
+        "args": record["args"],
+        "error": type(error).__name__,
+        "message": str(error),
+    }
+
+
+_queue = None
+_queue_lock = threading.Lock()
+# Queues still applying orphaned journals, e.g. while the database is down.
+_orphan_queues = []
+_journal_slots = 1
+
+
+def _journal_paths() -> list[str]:
+    """The journals of the workers: `<path>` for one, `<path>.<slot>` for more."""
+    if _journal_slots <= 1:
+        return [JOURNAL_PATH]
+    return [f"{JOURNAL_PATH}.{slot}" for slot in range(_journal_slots)]
+
+
+def _open_journal() -> Journal:
+    """
+    Opens this process's journal.
+
+    With several worker processes each claims the first free journal among
+    `<path>.0` to `<path>.<slots - 1>`. A worker replacing one that died
+    claims the freed journal and replays it.
+    """
+    for path in _journal_paths():
+        try:
+            return Journal(path)
+        except RuntimeError:
+            continue
+    raise RuntimeError(f"All {_journal_slots} journals at {JOURNAL_PATH} are in use.")
+
+
+def _replay_orphaned_journals(timeout: float = 10.0) -> int:
+    """
+    Applies the journals that no worker claims, such as `<path>.3` after the
+    number of workers went from 4 to 2, or `<path>` after it went from 1 to 2.
+
+    Journals locked by a live process, e.g. a worker of the previous
+    deployment or another worker replaying them, are skipped. Claimable
+    journals are left to the workers that claim them.
+
+    Args:
+        timeout: Seconds to wait for each journal to be applied. A journal
+            still unapplied then, e.g. while the database is down, keeps being
+            retried in the background until it is, or until `close`.
+
+    Returns:
+        The number of journals replayed.
+    """
+    claimable = set(_journal_paths())
+    name = re.compile(re.escape(JOURNAL_PATH) + r"(\.\d+)?")
+    replayed = 0
+    for path in sorted(glob.glob(glob.escape(JOURNAL_PATH) + "*")):
+        if path in claimable or not name.fullmatch(path):
+            continue
+        try:
+            journal = Journal(path)
+        except RuntimeError:
+            continue
+        logger.info("Replaying orphaned journal %s.", path)
+        queue = WriteBehindQueue(journal)
+        if queue.wait_until_empty(timeout):
+            queue.close()
+        else:
+            logger.warning(
+                "Orphaned journal %s is not applied yet; retrying in the background.",
+                path,
+            )
+            _orphan_queues.append(queue)
+        replayed += 1
+    return replayed
+
+
+def get_queue() -> WriteBehindQueue:
+    """Returns the process-wide queue, replaying the journal on first use."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = WriteBehindQueue(_open_journal())
+            atexit.register(_queue.close)
+        return _queue
+
+
+def start(slots: int = 1) -> None:
+    """
+    Replays the journal now rather than on the first tool call, along with
+    the journals left by a different number of workers.
+
+    Args:
+        slots: Number of worker processes sharing `JOURNAL_PATH`.
+    """
+    global _journal_slots
+    _journal_slots = slots
+    if ENABLED:
+        get_queue()
+        _replay_orphaned_journals()
+
+
+def close(timeout: float = 10.0) -> None:
+    """Applies the queued operations and stops the flushers."""
+    if _queue is not None:
+        _queue.close(timeout)
+    while _orphan_queues:
+        _orphan_queues.pop().close(timeout)
+
+
+def _caller(tool_context):
+    """Returns the key of the session a tool call belongs to."""
+    session = getattr(tool_context, "session", None)
+    return session.id if session is not None else None
+
+
+def apply(tool_context, op, **args) -> dict:
+    """
+    Applies a mutation now, or journals it in write-behind mode.
+
+    Args:
+        tool_context: The tool context of the calling tool.
+        op: A function registered with `operation`.
+        **args: The arguments of `op`.
+
+    Returns:
+        The dict returned by `op` if it was applied, otherwise
+        `{"pending": True}`.
+    """
+    if not ENABLED:
+        try:
+            with database.write_engine(tool_context).connect() as conn:
+                result = op(conn, **args)
+                conn.commit()
+        finally:
+            single_flight.invalidate_changed()
+        return result or {}
+    # Stamps the session's write so its reads go to the primary.
+    database.write_engine(tool_context)
+    get_queue().submit(
+        _caller(tool_context), op, args, timeout=resilience.TOOL_DEADLINE_SECONDS
+    )
+    return {"pending": True}
+
+
+def sees_pending_writes(func):
+    """
+    Decorates a read tool to wait for the session's pending writes first.
+
+    Writes of the session that failed since its last read are reported under
+    `failed_writes` in the tool's result.
+    """
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not ENABLED:
+            return func(*args, **kwargs)
+        tool_context = signature.bind_partial(*args, **kwargs).arguments.get(
+            "tool_context"
+        )
+        waited, failures = get_queue().wait_for(
+            _caller(tool_context), timeout=resilience.TOOL_DEADLINE_SECONDS
+        )
+        if waited:
+            # The writes may have landed after the session's write stamp
+            # expired; stamp again so the read goes to the primary.
+            database.write_engine(tool_context)
+        result = func(*args, **kwargs)
+        if failures and isinstance(result, dict):
+            result = {**result, "failed_writes": failures}
+        return result
+
+    return wrapper
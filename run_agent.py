@@ -1,11 +1,25 @@
 import asyncio
-from personal_assistant.agent import root_agent
-from google.adk.runners import InMemoryRunner
+
+from google.adk.runners import Runner
 from google.genai import types
 
+from personal_assistant import archival, database, write_behind
+from personal_assistant.agent import root_agent
+from personal_assistant.session_service import SqlSessionService
+
+
 async def main():
     """Runs the agent with a sample query."""
-    runner = InMemoryRunner(agent=root_agent, app_name="personal_assistant")
+    # Before the journal is replayed and archival starts, which need the tables.
+    database.create_tables(database.get_engine())
+    write_behind.start()
+    archival.start_background()
+    session_service = SqlSessionService(database.get_engine())
+    runner = Runner(
+        agent=root_agent,
+        app_name="personal_assistant",
+        session_service=session_service,
+    )
     session = await runner.session_service.create_session(
         app_name=runner.app_name, user_id="test_user"
     )
@@ -20,6 +34,8 @@ async def main():
         if event.content and event.content.parts and event.content.parts[0].text:
             response = event.content.parts[0].text
     print(response)
+    await session_service.close()
+    write_behind.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,43 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Fixtures shared by the tests."""
+
+import pytest
+
+from personal_assistant import database
+
+
+class ToolContext:
+    """The part of ADK's `ToolContext` the tools use."""
+
+    def __init__(self):
+        self.state = {}
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    """A migrated SQLite database, used as the primary with no replicas."""
+    engine = database.connect_with_url(f"sqlite:///{tmp_path / 'assistant.db'}")
+    database.create_tables(engine)
+    monkeypatch.setattr(database, "_engine", engine)
+    monkeypatch.setattr(database, "_replicas", [])
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def context():
+    return ToolContext()
@@ -0,0 +1,95 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Tests of archiving completed tasks and stale stashed URLs, against SQLite."""
+
+import time
+
+import sqlalchemy
+
+from personal_assistant import archival, database
+from personal_assistant.sub_agents.checkmate import tools as checkmate
+from personal_assistant.sub_agents.stash import tools as stash
+
+DAY = 86400
+
+
+def _completed_tasks(context, completed_at: list) -> tuple[str, str, list[str]]:
+    """Adds a user with a list of one completed task per time in `completed_at`."""
+    added = checkmate.add_user_and_list("alice", "groceries", context)
+    task_ids = [
+        checkmate.add_task_to_list(added["list_id"], f"task {i}", context)["task_id"]
+        for i in range(len(completed_at))
+    ]
+    checkmate.complete_tasks(task_ids, context)
+    with database.get_engine().begin() as conn:
+        for task_id, at in zip(task_ids, completed_at, strict=True):
+            conn.execute(
+                sqlalchemy.update(database.tasks)
+                .where(database.tasks.c.task_id == task_id)
+                .values(completed_at=at)
+            )
+    return added["user_id"], added["list_id"], task_ids
+
+
+def _task_ids(engine, table) -> list[str]:
+    with engine.connect() as conn:
+        return sorted(conn.execute(sqlalchemy.select(table.c.task_id)).scalars())
+
+
+def test_old_completed_tasks_are_archived_as_changes(engine, context):
+    now = time.time()
+    user_id, _, (old, recent) = _completed_tasks(context, [now - 40 * DAY, now])
+    version = checkmate.get_todo_changes(user_id, context)["version"]
+
+    assert archival.archive_completed_tasks(engine, older_than_days=30) == 1
+    assert _task_ids(engine, database.tasks_archive) == [old]
+    assert _task_ids(engine, database.tasks) == [recent]
+    changes = checkmate.get_todo_changes(user_id, context)
+    assert changes["version"] > version
+    assert [(d["id"], d["kind"]) for d in changes["deleted"]] == [
+        (old, "archived_task")
+    ]
+
+
+def test_tasks_without_completion_time_wait_for_the_migration(engine, context):
+    _, list_id, (completed,) = _completed_tasks(context, [None])
+    open_task = checkmate.add_task_to_list(list_id, "open", context)
+
+    assert archival.archive_completed_tasks(engine, older_than_days=-1) == 0
+    database.create_tables(engine)
+    assert archival.archive_completed_tasks(engine, older_than_days=-1) == 1
+    assert _task_ids(engine, database.tasks_archive) == [completed]
+    assert _task_ids(engine, database.tasks) == [open_task["task_id"]]
+
+
+def test_updating_an_archived_url_restores_it(engine, context):
+    user_id = stash.add_user("alice", context)["user_id"]
+    url_id = stash.stash_url(user_id, "https://a.example", "A", "", context)["url_id"]
+    with engine.begin() as conn:
+        conn.execute(
+            sqlalchemy.update(database.stashed_urls).values(
+                updated_at=time.time() - 40 * DAY
+            )
+        )
+    assert archival.archive_stale_urls(engine, older_than_days=30) == 1
+
+    assert stash.update_stashed_url(url_id, "", "B", "", context)["status"] == (
+        "success"
+    )
+    urls = stash.get_stashed_urls(user_id, context, compact=False)["stashed_urls"]
+    assert [(u["url"], u["summary"]) for u in urls] == [("https://a.example", "B")]
+    result = stash.update_stashed_url("missing", "", "B", "", context)
+    assert result["error_code"] == "URL_NOT_FOUND"
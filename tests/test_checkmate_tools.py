@@ -0,0 +1,107 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Tests of the Checkmate tools, against SQLite."""
+
+import sqlalchemy
+
+from personal_assistant import database
+from personal_assistant.sub_agents.checkmate import tools
+
+
+def _add_user(context, name: str) -> tuple[str, str]:
+    result = tools.add_user_and_list(name, "groceries", context)
+    return result["user_id"], result["list_id"]
+
+
+def test_changes_are_tracked_per_user(engine, context):
+    alice, alice_list = _add_user(context, "alice")
+    for i in range(5):
+        tools.add_task_to_list(alice_list, f"task {i}", context)
+    tools.get_todo_changes(alice, context)
+    bob, bob_list = _add_user(context, "bob")
+    tools.add_task_to_list(bob_list, "milk", context)
+
+    changes = tools.get_todo_changes(bob, context)
+    assert changes["since_version"] == 0
+    assert [t["description"] for t in changes["changed_tasks"]] == ["milk"]
+    assert tools.get_todo_changes(alice, context)["changed_tasks"] == []
+
+
+def test_deleted_tasks_are_reported_as_changes(engine, context):
+    user_id, list_id = _add_user(context, "alice")
+    task_id = tools.add_task_to_list(list_id, "milk", context)["task_id"]
+    version = tools.get_todo_changes(user_id, context)["version"]
+
+    assert tools.delete_tasks([task_id], context)["status"] == "success"
+    changes = tools.get_todo_changes(user_id, context)
+    assert changes["since_version"] == version
+    assert changes["version"] > version
+    assert changes["changed_tasks"] == []
+    assert [(d["id"], d["kind"]) for d in changes["deleted"]] == [(task_id, "task")]
+
+
+def test_tasks_of_another_user_are_refused(engine, context):
+    _, alice_list = _add_user(context, "alice")
+    _, bob_list = _add_user(context, "bob")
+    task_ids = [
+        tools.add_task_to_list(list_id, "milk", context)["task_id"]
+        for list_id in (alice_list, bob_list)
+    ]
+
+    result = tools.complete_tasks(task_ids, context)
+    assert result["error_code"] == "TASKS_OF_SEVERAL_USERS"
+    result = tools.complete_tasks([*task_ids[:1], "missing"], context)
+    assert result["missing_task_ids"] == ["missing"]
+
+
+def _completed(engine) -> dict[str, tuple[bool, float | None]]:
+    with engine.connect() as conn:
+        rows = conn.execute(
+            sqlalchemy.select(
+                database.tasks.c.task_id,
+                database.tasks.c.is_completed,
+                database.tasks.c.completed_at,
+            )
+        )
+        return {task_id: (done, at) for task_id, done, at in rows}
+
+
+def test_bulk_task_changes(engine, context):
+    _, list_id = _add_user(context, "alice")
+    task_ids = [
+        tools.add_task_to_list(list_id, f"task {i}", context)["task_id"]
+        for i in range(4)
+    ]
+
+    assert tools.complete_tasks(task_ids[:3], context)["updated"] == 3
+    completed_at = _completed(engine)[task_ids[0]][1]
+    assert completed_at is not None
+    # Completing again keeps the original completion time.
+    assert tools.complete_tasks(task_ids[:1], context)["updated"] == 1
+    assert _completed(engine)[task_ids[0]] == (True, completed_at)
+    assert tools.reopen_tasks(task_ids[2:3], context)["updated"] == 1
+    assert _completed(engine)[task_ids[2]] == (False, None)
+
+    assert tools.clear_completed(list_id, context) == {
+        "status": "success",
+        "deleted": 2,
+    }
+    assert sorted(_completed(engine)) == sorted(task_ids[2:])
+
+
+def test_open_tasks_have_a_partial_index(engine):
+    indexes = sqlalchemy.inspect(engine).get_indexes("tasks")
+    assert "ix_tasks_open_by_list" in {index["name"] for index in indexes}
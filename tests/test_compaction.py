@@ -0,0 +1,113 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+"""Tests of the conversation history compaction."""
+
+from types import SimpleNamespace
+
+from google.adk.models import LlmRequest
+from google.genai import types
+
+from personal_assistant import compaction
+
+
+def _turn(i: int) -> list[types.Content]:
+    """A user message, a tool call and its bulky response."""
+    tasks = [{"task_id": f"t{i}-{j}", "description": "x" * 200} for j in range(5)]
+    return [
+        types.Content(role="user", parts=[types.Part(text=f"message {i}")]),
+        types.Content(
+            role="model",
+            parts=[
+                types.Part(
+                    function_call=types.FunctionCall(
+                        name="get_todo_list", args={"user_id": "u1"}
+                    )
+                )
+            ],
+        ),
+        types.Content(
+            role="user",
+            parts=[
+                types.Part(
+                    function_response=types.FunctionResponse(
+                        name="get_todo_list",
+                        response={"list_id": f"l{i}", "tasks": tasks},
+                    )
+                )
+            ],
+        ),
+    ]
+
+
+def _compact(context, turns: int) -> list[types.Content]:
+    request = LlmRequest(contents=[c for i in range(turns) for c in _turn(i)])
+    assert compaction.compact_history(context, request) is None
+    return request.contents
+
+
+def test_collapsed_response_keeps_identifiers():
+    response = {
+        "status": "success",
+        "list_id": "l1",
+        "lists": [{"list_id": "l2", "tasks": [{"task_id": "t1"}]}],
+    }
+    assert compaction.collapse_tool_response(response) == {
+        "compacted": True,
+        "status": "success",
+        "list_id": "l1",
+        "lists": "1 items omitted",
+        "list_ids": ["l2"],
+        "task_ids": ["t1"],
+    }
+
+
+def test_history_under_budget_is_sent_unchanged():
+    context = SimpleNamespace(state={}, agent_name="checkmate")
+    assert _compact(context, 1) == _turn(0)
+    assert context.state[compaction.STATS_STATE_KEY]["tokens_saved"] == 0
+
+
+def test_old_tool_responses_are_collapsed_first(monkeypatch):
+    monkeypatch.setattr(compaction, "HISTORY_TOKEN_BUDGET", 900)
+    monkeypatch.setattr(compaction, "KEEP_RECENT_TURNS", 2)
+    context = SimpleNamespace(state={}, agent_name="checkmate")
+
+    contents = _compact(context, 6)
+    assert contents[-6:] == _turn(4) + _turn(5)
+    response = contents[2].parts[0].function_response.response
+    assert response["compacted"] and response["list_id"] == "l0"
+    assert compaction.SUMMARY_STATE_KEY not in context.state
+
+
+def test_old_turns_are_summarized_with_their_identifiers(monkeypatch):
+    monkeypatch.setattr(compaction, "HISTORY_TOKEN_BUDGET", 300)
+    monkeypatch.setattr(compaction, "KEEP_RECENT_TURNS", 2)
+    context = SimpleNamespace(state={}, agent_name="checkmate")
+
+    contents = _compact(context, 6)
+    assert contents[1:] == _turn(4) + _turn(5)
+    summary = contents[0].parts[0].text
+    assert summary.startswith("[Summary of the earlier conversation]")
+    assert "message 3" in summary and "message 4" not in summary
+    assert '"t0-4"' in summary and '"l3"' in summary
+    assert context.state[compaction.STATS_STATE_KEY]["tokens_saved"] > 0
+
+    # The next request only summarizes the turn that newly left the window.
+    _compact(context, 7)
+    record = context.state[compaction.SUMMARY_STATE_KEY]["checkmate"]
+    assert record["turns"] == 5
+    assert record["summary"].count("message 0") == 1
@@ -0,0 +1,91 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+"""Tests of running the tool calls of one model response concurrently."""
+
+import asyncio
+from types import SimpleNamespace
+
+from personal_assistant import concurrency
+
+
+def _tool(log: list, declare):
+    """A tool, declared with `declare`, logging when its calls start and end."""
+
+    def tool(list_id: str, tool_context) -> dict:
+        raise AssertionError("Called through run_async.")
+
+    async def run_async(list_id: str, tool_context) -> dict:
+        log.append(("start", list_id))
+        await asyncio.sleep(0.01)
+        log.append(("end", list_id))
+        return {}
+
+    tool.run_async = run_async
+    return concurrency.concurrent_tool(declare(tool))
+
+
+def _run(*calls: tuple) -> None:
+    """Runs `(tool, list_id)` calls as ADK runs the calls of one response."""
+    context = SimpleNamespace(invocation_id="invocation")
+
+    async def main():
+        await asyncio.gather(*(tool(list_id, context) for tool, list_id in calls))
+
+    asyncio.run(main())
+    assert concurrency._in_flight == {}
+
+
+def _overlapped(log: list) -> bool:
+    return log[:2] == [("start", "a"), ("start", "b")]
+
+
+def test_writes_to_different_rows_overlap():
+    log = []
+    write = _tool(log, concurrency.writes("list_id"))
+    _run((write, "a"), (write, "b"))
+    assert _overlapped(log)
+
+
+def test_writes_to_the_same_row_run_in_order():
+    log = []
+    write = _tool(log, concurrency.writes("list_id"))
+    _run((write, "a"), (write, "a"))
+    assert log == [("start", "a"), ("end", "a")] * 2
+
+
+def test_reads_wait_for_earlier_writes_only():
+    log = []
+    read = _tool(log, concurrency.reads)
+    write = _tool(log, concurrency.writes("list_id"))
+    _run((write, "a"), (read, "b"))
+    assert log[:2] == [("start", "a"), ("end", "a")]
+
+    log.clear()
+    _run((read, "a"), (write, "b"))
+    assert _overlapped(log)
+
+
+def test_commuting_inserts_overlap():
+    log = []
+    insert = _tool(log, concurrency.writes("list_id", commutes=True))
+    _run((insert, "a"), (insert, "a"))
+    assert log[:2] == [("start", "a")] * 2
+    # Undeclared tools may write anything, so they order against every write.
+    undeclared = _tool(log, lambda tool: tool)
+    log.clear()
+    _run((insert, "a"), (undeclared, "b"))
+    assert log[:2] == [("start", "a"), ("end", "a")]
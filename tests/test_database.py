@@ -0,0 +1,65 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+"""Tests of the routing of reads to replicas, against SQLite."""
+
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from personal_assistant import database
+from personal_assistant.sub_agents.checkmate import tools
+
+
+def _other_session():
+    return SimpleNamespace(state={})
+
+
+@pytest.fixture
+def replica(engine, tmp_path, monkeypatch):
+    """A second, empty SQLite database standing in for a replica."""
+    replica = database.connect_with_url(f"sqlite:///{tmp_path / 'replica.db'}")
+    database.create_tables(replica)
+    monkeypatch.setattr(database, "_replicas", [replica])
+    monkeypatch.setattr(database, "_replica_lags", {})
+    yield replica
+    replica.dispose()
+
+
+def test_reads_go_to_the_primary_after_a_write(engine, replica, context):
+    assert database.read_engine(context) is replica
+    assert database.write_engine(context) is engine
+    assert database.read_engine(context) is engine
+    assert database.read_engine(_other_session()) is replica
+
+    context.state[database.LAST_WRITE_STATE_KEY] = (
+        time.time() - database.READ_YOUR_WRITES_SECONDS - 1
+    )
+    assert database.read_engine(context) is replica
+
+
+def test_session_reads_its_own_writes(engine, replica, context):
+    user_id = tools.add_user_and_list("alice", "groceries", context)["user_id"]
+
+    assert tools.get_user_by_name("alice", context) == {"user_id": user_id}
+    # Other sessions read the replica, which has not caught up here.
+    assert tools.get_user_by_name("alice", _other_session()) == {}
+
+
+def test_lagging_replica_is_skipped(engine, replica, context, monkeypatch):
+    monkeypatch.setattr(database, "replica_lag", lambda _: float("inf"))
+    assert database.read_engine(context) is engine
@@ -0,0 +1,79 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+"""Tests of the compact tool-result encodings, against SQLite."""
+
+from personal_assistant import encoding
+from personal_assistant.sub_agents.checkmate import tools as checkmate
+from personal_assistant.sub_agents.stash import tools as stash
+
+
+def test_truncate_ends_on_a_word_boundary():
+    assert encoding.truncate("short", limit=10) == ("short", False)
+    assert encoding.truncate("one two three", limit=9) == ("one two…", True)
+    assert encoding.truncate("abcdefghij", limit=4) == ("abcd…", True)
+
+
+def test_compact_todo_list_holds_the_verbose_content(engine, context):
+    added = checkmate.add_user_and_list("alice", "chores", context)
+    task_ids = [
+        checkmate.add_task_to_list(added["list_id"], task, context)["task_id"]
+        for task in ("dishes", "laundry")
+    ]
+    checkmate.complete_tasks(task_ids[:1], context)
+
+    verbose = checkmate.get_todo_list(added["user_id"], context, compact=False)
+    compact = checkmate.get_todo_list(
+        added["user_id"], context, compact=True, include_completed=True
+    )
+    lists = compact["todo_lists"]["rows"]
+    assert compact["tasks"]["columns"] == [
+        "task_id",
+        "list_row",
+        "description",
+        "completed",
+    ]
+    assert verbose["todo_lists"] == [
+        {
+            "list_id": list_id,
+            "list_name": list_name,
+            "tasks": [
+                {"task_id": t, "description": d, "completed": c}
+                for t, row, d, c in compact["tasks"]["rows"]
+                if row == i
+            ],
+        }
+        for i, (list_id, list_name) in enumerate(lists)
+    ]
+
+    open_tasks = checkmate.get_todo_list(added["user_id"], context, compact=True)
+    assert open_tasks["completed_tasks_omitted"]
+    assert [t[0] for t in open_tasks["tasks"]["rows"]] == task_ids[1:]
+
+
+def test_truncated_summaries_can_be_fetched_in_full(engine, context):
+    user_id = stash.add_user("alice", context)["user_id"]
+    summary = "word " * encoding.SUMMARY_PREVIEW_CHARS
+    url_id = stash.stash_url(user_id, "https://a.example", summary, "", context)[
+        "url_id"
+    ]
+
+    result = stash.get_stashed_urls(user_id, context, compact=True)
+    ((row_url_id, url, preview, _),) = result["stashed_urls"]["rows"]
+    assert row_url_id == url_id and url == "https://a.example"
+    assert len(preview) <= encoding.SUMMARY_PREVIEW_CHARS + 1
+    assert result["truncated_summaries"] == [url_id]
+    assert stash.get_stashed_url_summary(url_id, context)["summary"] == summary
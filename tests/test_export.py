@@ -0,0 +1,125 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+"""Tests of exporting and restoring a user, against SQLite."""
+
+import pytest
+import sqlalchemy
+
+from personal_assistant import archival, database, export
+from personal_assistant.sub_agents.checkmate import tools as checkmate
+from personal_assistant.sub_agents.stash import tools as stash
+
+FORMATS = [
+    pytest.param(
+        fmt,
+        marks=pytest.mark.skipif(
+            fmt == "parquet" and export.pyarrow is None, reason="needs pyarrow"
+        ),
+    )
+    for fmt in export.FORMATS
+]
+
+# Spelled out rather than taken from `export.TABLES`, which they check.
+USER_TABLES = (
+    database.users,
+    database.todolists,
+    database.tasks,
+    database.tasks_archive,
+    database.stashed_urls,
+    database.stashed_urls_archive,
+)
+
+
+def _add_user(context, name: str) -> str:
+    """Adds a user with open, completed and archived tasks and stashed URLs."""
+    added = checkmate.add_user_and_list(name, "groceries", context)
+    task_ids = [
+        checkmate.add_task_to_list(added["list_id"], f"{name}'s task\t{i}\n", context)[
+            "task_id"
+        ]
+        for i in range(3)
+    ]
+    checkmate.complete_tasks(task_ids[1:], context)
+    stale_url_id = stash.stash_url(
+        added["user_id"], f"https://{name}.example/old", "A", "x", context
+    )["url_id"]
+    stash.stash_url(added["user_id"], f"https://{name}.example", "B", "y", context)
+    engine = database.get_engine()
+    with engine.begin() as conn:
+        conn.execute(
+            sqlalchemy.update(database.tasks)
+            .where(database.tasks.c.task_id == task_ids[2])
+            .values(completed_at=0)
+        )
+        conn.execute(
+            sqlalchemy.update(database.stashed_urls)
+            .where(database.stashed_urls.c.url_id == stale_url_id)
+            .values(updated_at=0)
+        )
+    archival.archive_completed_tasks(engine, older_than_days=1)
+    archival.archive_stale_urls(engine, older_than_days=1)
+    return added["user_id"]
+
+
+def _snapshot(engine) -> dict[str, list[tuple]]:
+    """Returns every row of the tables holding user data, sorted."""
+    with engine.connect() as conn:
+        return {
+            table.name: sorted(
+                tuple(row) for row in conn.execute(sqlalchemy.select(table))
+            )
+            for table in USER_TABLES
+        }
+
+
+@pytest.fixture
+def other_engine(tmp_path):
+    engine = database.connect_with_url(f"sqlite:///{tmp_path / 'other.db'}")
+    database.create_tables(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_export_restores_only_the_user(engine, other_engine, context, tmp_path, fmt):
+    alice = _add_user(context, "alice")
+    exported = _snapshot(engine)
+    assert all(exported.values())
+    _add_user(context, "bob")
+    out_dir = str(tmp_path / "alice")
+
+    manifest = export.export_user(engine, alice, out_dir, fmt)
+    assert manifest["rows"] == {name: len(rows) for name, rows in exported.items()}
+    restored = export.restore_user(other_engine, out_dir)
+    assert restored["rows"] == manifest["rows"]
+    assert _snapshot(other_engine) == exported
+
+
+def test_restore_replaces_the_current_data(engine, context, tmp_path):
+    alice = _add_user(context, "alice")
+    exported = _snapshot(engine)
+    out_dir = str(tmp_path / "alice")
+    export.export_user(engine, alice, out_dir)
+    list_id = checkmate.get_list_by_name(alice, "groceries", context)["list_id"]
+    checkmate.add_task_to_list(list_id, "added after the export", context)
+    changed = _snapshot(engine)
+
+    with pytest.raises(sqlalchemy.exc.IntegrityError):
+        export.restore_user(engine, out_dir)
+    assert _snapshot(engine) == changed
+    export.restore_user(engine, out_dir, replace=True)
+    assert _snapshot(engine) == exported
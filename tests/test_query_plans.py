@@ -0,0 +1,77 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+"""Tests of the checks the query-plan harness applies to plans."""
+
+from types import SimpleNamespace
+
+from benchmarks import query_plans
+
+LIMITS = SimpleNamespace(max_loops=1000, max_filtered=10000)
+
+
+def _plan(*children: dict, **node) -> dict:
+    return {**node, "Plans": list(children)}
+
+
+def test_good_plans_have_no_problems():
+    plan = _plan(
+        _plan(**{"Node Type": "Seq Scan", "Relation Name": "users"}),
+        _plan(
+            **{
+                "Node Type": "Index Scan",
+                "Relation Name": "tasks",
+                "Index Name": "ix_tasks_open_by_list",
+                "Actual Loops": 10,
+            }
+        ),
+        **{"Node Type": "Nested Loop"},
+    )
+    assert query_plans._problems({"Plan": plan}, {"tasks"}, LIMITS) == []
+
+
+def test_bad_plan_shapes_are_reported():
+    plan = _plan(
+        _plan(**{"Node Type": "Seq Scan", "Relation Name": "users"}),
+        _plan(
+            **{
+                "Node Type": "Seq Scan",
+                "Relation Name": "tasks",
+                "Rows Removed by Filter": 100,
+                "Actual Loops": 5000,
+            }
+        ),
+        **{"Node Type": "Nested Loop"},
+    )
+    assert query_plans._problems({"Plan": plan}, {"tasks"}, LIMITS) == [
+        "nested loop runs its inner side 5000 times",
+        "sequential scan of tasks",
+        "scan of tasks filters out 500000 rows",
+    ]
+
+
+def test_plan_descriptions_leave_out_timings():
+    node = {
+        "Node Type": "Index Scan",
+        "Index Name": "ix_tasks_open_by_list",
+        "Relation Name": "tasks",
+        "Actual Rows": 3,
+        "Actual Loops": 2,
+        "Actual Total Time": 0.5,
+    }
+    assert query_plans._describe(node) == (
+        "Index Scan using ix_tasks_open_by_list on tasks rows=3 loops=2"
+    )
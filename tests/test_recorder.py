@@ -0,0 +1,99 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+"""Tests of recording agent turns."""
+
+import asyncio
+import os
+import stat
+
+import pytest
+from google.adk.events import Event
+from google.genai import types
+
+from personal_assistant import recorder
+
+
+def _event(**part) -> Event:
+    return Event(
+        author="checkmate",
+        content=types.Content(role="model", parts=[types.Part(**part)]),
+    )
+
+
+async def _events(fail: bool = False):
+    yield _event(
+        function_call=types.FunctionCall(
+            name="add_task_to_list", args={"list_id": "l1", "task_description": "milk"}
+        )
+    )
+    yield _event(
+        function_response=types.FunctionResponse(
+            name="add_task_to_list",
+            response={"status": "success", "task_id": "t1", "tasks": ["milk"]},
+        )
+    )
+    if fail:
+        raise ConnectionError
+    yield _event(text="Added milk.")
+
+
+def _record(path: str, fail: bool = False) -> list[Event]:
+    rec = recorder.Recorder(path)
+
+    async def main():
+        return [
+            event
+            async for event in rec.record(_events(fail), "u1", "s1", "add milk")
+        ]
+
+    try:
+        return asyncio.run(main())
+    finally:
+        rec.close()
+
+
+def test_turns_are_recorded_with_their_ids(tmp_path):
+    path = str(tmp_path / "turns.jsonl")
+    assert len(_record(path)) == 3
+
+    (turn,) = recorder.load(path)
+    assert (turn["user"], turn["session"], turn["message"]) == ("u1", "s1", "add milk")
+    call, result, reply = turn["steps"]
+    assert call["calls"] == [
+        ["add_task_to_list", {"list_id": "l1", "task_description": "milk"}]
+    ]
+    name, status, _, ids = result["results"][0]
+    assert (name, status, ids) == ("add_task_to_list", "success", {"task_id": "t1"})
+    assert reply["text"] == "Added milk."
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+
+def test_failed_turns_are_recorded(tmp_path):
+    path = str(tmp_path / "turns.jsonl")
+    with pytest.raises(ConnectionError):
+        _record(path, fail=True)
+
+    (turn,) = recorder.load(path)
+    assert turn["error"] == "ConnectionError"
+    assert len(turn["steps"]) == 2
+
+
+def test_other_formats_are_refused(tmp_path):
+    path = tmp_path / "turns.jsonl"
+    path.write_text('{"v": 1}\n')
+    with pytest.raises(ValueError):
+        list(recorder.load(str(path)))
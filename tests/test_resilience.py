@@ -0,0 +1,72 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Tests of tool deadlines, retries and the circuit breaker."""
+
+import asyncio
+import time
+
+import pytest
+
+from personal_assistant import resilience
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    """A breaker opened by one failure that lets a trial through at once."""
+    breaker = resilience.CircuitBreaker(failure_threshold=1, reset_seconds=0.0)
+    monkeypatch.setattr(resilience, "breaker", breaker)
+    breaker.record_failure()
+    assert breaker.state == "half_open"
+    return breaker
+
+
+@resilience.resilient(idempotent=True)
+def _read() -> dict:
+    return {"status": "success"}
+
+
+def test_trial_ending_in_a_programming_error_lets_the_next_one_through(breaker):
+    @resilience.resilient(idempotent=True)
+    def broken():
+        raise ValueError("a bug, not an outage")
+
+    with pytest.raises(ValueError):
+        broken()
+    assert _read() == {"status": "success"}
+    assert breaker.state == "closed"
+
+
+def test_nested_tool_runs_during_its_callers_trial(breaker):
+    @resilience.resilient(idempotent=True)
+    def outer():
+        return _read()
+
+    assert outer() == {"status": "success"}
+    assert breaker.state == "closed"
+
+
+@resilience.resilient(idempotent=True, deadline_seconds=0.05)
+def _hung_read() -> dict:
+    time.sleep(0.5)
+    return {"status": "success"}
+
+
+def test_deadline_returns_an_error_result(monkeypatch):
+    monkeypatch.setattr(resilience, "breaker", resilience.CircuitBreaker())
+    assert _hung_read()["error_code"] == "DEADLINE_EXCEEDED"
+    result = asyncio.run(_hung_read.run_async())
+    assert result["error_code"] == "DEADLINE_EXCEEDED"
+    assert result["retryable"]
@@ -0,0 +1,78 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+"""Tests of the serving entry point."""
+
+import asyncio
+import sys
+
+import pytest
+
+from personal_assistant import archival, server
+
+
+def test_requests_beyond_the_queue_are_rejected():
+    async def main():
+        admission = server.Admission(max_running=1, max_queued=1, queue_timeout=5)
+        await admission.acquire()
+        queued = asyncio.create_task(admission.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(server.Overloaded, match="waiting"):
+            await admission.acquire()
+        admission.release()
+        await queued
+        assert admission.stats()["running"] == 1
+        assert admission.stats()["rejected"] == 1
+
+    asyncio.run(main())
+
+
+def test_queued_requests_time_out():
+    async def main():
+        admission = server.Admission(max_running=1, max_queued=1, queue_timeout=0.01)
+        await admission.acquire()
+        with pytest.raises(server.Overloaded, match="Timed out"):
+            await admission.acquire()
+        assert admission.stats()["queued"] == 0
+
+    asyncio.run(main())
+
+
+def test_draining_waits_for_running_requests():
+    async def main():
+        admission = server.Admission(max_running=2, max_queued=0, queue_timeout=1)
+        await admission.acquire()
+        drained = asyncio.create_task(admission.drain(timeout=1))
+        await asyncio.sleep(0)
+        with pytest.raises(server.Overloaded, match="shutting down"):
+            await admission.acquire()
+        assert not drained.done()
+        admission.release()
+        assert await drained
+
+    asyncio.run(main())
+
+
+def test_archival_runs_once_in_the_supervisor(engine, monkeypatch):
+    calls = []
+    monkeypatch.setattr(sys, "argv", ["server", "--workers", "4"])
+    # Restored after the test, since `main` sets it for the workers.
+    monkeypatch.setenv("SERVER_WORKERS", "1")
+    monkeypatch.setattr(archival, "start_background", lambda: calls.append("archival"))
+    monkeypatch.setattr(server.uvicorn, "run", lambda *a, **kw: calls.append("run"))
+
+    server.main()
+    assert calls == ["archival", "run"]
@@ -0,0 +1,66 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Tests of the SQL session service, against SQLite."""
+
+import asyncio
+
+import sqlalchemy
+from google.adk.events import Event, EventActions
+from google.genai import types
+
+from personal_assistant import database
+from personal_assistant.session_service import SqlSessionService
+
+
+def test_constructor_sends_no_statements(tmp_path):
+    engine = database.connect_with_url(f"sqlite:///{tmp_path / 'sessions.db'}")
+    statements = []
+    sqlalchemy.event.listen(
+        engine, "before_cursor_execute", lambda *args: statements.append(args[2])
+    )
+    SqlSessionService(engine)
+    assert statements == []
+    engine.dispose()
+
+
+def test_events_and_state_survive_a_new_service(tmp_path):
+    engine = database.connect_with_url(f"sqlite:///{tmp_path / 'sessions.db'}")
+    database.create_tables(engine)
+
+    async def run():
+        service = SqlSessionService(engine)
+        session = await service.create_session(app_name="app", user_id="alice")
+        await service.append_event(
+            session,
+            Event(
+                author="user",
+                content=types.Content(role="user", parts=[types.Part(text="hi")]),
+                actions=EventActions(
+                    state_delta={"list_name": "groceries", "user:name": "Alice"}
+                ),
+            ),
+        )
+        await service.close()
+        loaded = await SqlSessionService(engine).get_session(
+            app_name="app", user_id="alice", session_id=session.id
+        )
+        return loaded
+
+    session = asyncio.run(run())
+    assert [event.content.parts[0].text for event in session.events] == ["hi"]
+    assert session.state["list_name"] == "groceries"
+    assert session.state["user:name"] == "Alice"
+    engine.dispose()
@@ -0,0 +1,46 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Tests of read coalescing."""
+
+import threading
+import time
+
+import pytest
+
+from personal_assistant import single_flight
+
+
+def test_follower_stops_waiting_at_its_deadline(monkeypatch):
+    monkeypatch.setattr(single_flight, "ENABLED", True)
+    started, release = threading.Event(), threading.Event()
+
+    def hung_read():
+        started.set()
+        release.wait(5)
+        return "rows"
+
+    leader = threading.Thread(
+        target=single_flight.run, args=("user", ("read",), hung_read)
+    )
+    leader.start()
+    started.wait(5)
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        single_flight.run("user", ("read",), hung_read, deadline=time.monotonic() + 0.1)
+    assert time.monotonic() - start < 1
+    release.set()
+    leader.join(5)
+    assert single_flight.stats()["in_flight"] == 0
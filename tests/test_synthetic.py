@@ -0,0 +1,61 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+"""Tests of the synthetic data generator, against SQLite."""
+
+import pytest
+import sqlalchemy
+
+from benchmarks import synthetic
+from personal_assistant import database
+
+
+def _snapshot(engine) -> dict[str, list[tuple]]:
+    with engine.connect() as conn:
+        return {
+            table.name: sorted(
+                tuple(row) for row in conn.execute(sqlalchemy.select(table))
+            )
+            for table in database.metadata.sorted_tables
+        }
+
+
+@pytest.fixture
+def other_engine(tmp_path):
+    engine = database.connect_with_url(f"sqlite:///{tmp_path / 'other.db'}")
+    database.create_tables(engine)
+    yield engine
+    engine.dispose()
+
+
+def test_a_seed_always_generates_the_same_rows(engine, other_engine):
+    loaded = synthetic.generate(engine, rows=3000, seed=7, batch_size=500)
+    assert 1500 < sum(loaded["rows"].values()) < 6000
+    assert synthetic.generate(other_engine, rows=3000, seed=7)["rows"] == (
+        loaded["rows"]
+    )
+    assert _snapshot(engine) == _snapshot(other_engine)
+
+
+def test_seeds_load_side_by_side(engine):
+    first = synthetic.generate(engine, rows=1000, seed=1)
+    with pytest.raises(ValueError):
+        synthetic.generate(engine, rows=1000, seed=1)
+    second = synthetic.generate(engine, rows=1000, seed=2)
+
+    rows = {name: len(rows) for name, rows in _snapshot(engine).items()}
+    for name, count in first["rows"].items():
+        assert rows[name] == count + second["rows"][name]
@@ -0,0 +1,60 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+"""Tests of the start-up warm-up, against SQLite."""
+
+import sqlalchemy
+
+from personal_assistant import database, warmup, write_behind
+from personal_assistant.sub_agents.checkmate import tools as checkmate
+from personal_assistant.sub_agents.stash import tools as stash
+
+
+def _snapshot(engine) -> dict[str, list[tuple]]:
+    with engine.connect() as conn:
+        return {
+            table.name: sorted(
+                tuple(row) for row in conn.execute(sqlalchemy.select(table))
+            )
+            for table in database.metadata.sorted_tables
+        }
+
+
+def test_dummy_args_follow_the_annotations():
+    def tool(list_id: str, task_ids: list[str], done: bool, tool_context, n: int = 1):
+        pass
+
+    assert warmup._dummy_args(tool) == {
+        "list_id": warmup._WARMUP_ID,
+        "task_ids": [warmup._WARMUP_ID],
+        "done": False,
+    }
+
+
+def test_operations_are_warmed_up_without_writing(engine, context):
+    added = checkmate.add_user_and_list("alice", "groceries", context)
+    checkmate.add_task_to_list(added["list_id"], "milk", context)
+    stash.stash_url(added["user_id"], "https://a.example", "A", "", context)
+    before = _snapshot(engine)
+    sent = []
+    sqlalchemy.event.listen(
+        engine, "before_cursor_execute", lambda *args: sent.append(args[2])
+    )
+
+    assert 0 < warmup._run_operations() <= len(list(write_behind.operations()))
+    writes = [s for s in sent if warmup._WRITE.search(s.removeprefix("EXPLAIN "))]
+    assert writes and all(s.startswith("EXPLAIN ") for s in writes)
+    assert _snapshot(engine) == before
@@ -0,0 +1,206 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Tests of the write-behind journal and queue, against SQLite."""
+
+import shutil
+import time
+
+import pytest
+import sqlalchemy
+
+from personal_assistant import database, resilience, write_behind
+
+
+@write_behind.operation
+def _add_user(conn: sqlalchemy.engine.base.Connection, user_id: str):
+    conn.execute(database.users.insert().values(user_id=user_id, user_name=user_id))
+
+
+def _records(count: int) -> list[dict]:
+    return [
+        {"op_id": f"op-{i}", "op": _add_user.op_name, "args": {"user_id": f"user-{i}"}}
+        for i in range(count)
+    ]
+
+
+def _user_ids(engine) -> list[str]:
+    with engine.connect() as conn:
+        return sorted(
+            conn.execute(sqlalchemy.select(database.users.c.user_id)).scalars()
+        )
+
+
+def _replay(path: str) -> None:
+    write_behind.WriteBehindQueue(write_behind.Journal(path)).close()
+
+
+def test_replay_after_crash_applies_each_operation_once(engine, tmp_path):
+    path = str(tmp_path / "journal.log")
+    records = _records(5)
+    journal = write_behind.Journal(path)
+    journal.append(records)
+    # Crashed while appending another record.
+    journal.append([], raw=b'{"op_id": "op-torn", "op"')
+    journal.close()
+    # The first two were committed but never acknowledged in the journal.
+    with engine.begin() as conn:
+        conn.execute(
+            database.write_behind_ops.insert(),
+            [{"op_id": r["op_id"], "applied_at": 0.0} for r in records[:2]],
+        )
+        conn.execute(
+            database.users.insert(),
+            [{"user_id": f"user-{i}", "user_name": f"user-{i}"} for i in range(2)],
+        )
+    shutil.copy(path, path + ".copy")
+
+    _replay(path)
+    assert _user_ids(engine) == [f"user-{i}" for i in range(5)]
+    with open(path, "rb") as f:
+        assert f.read() == b""
+
+    # Crashed again after applying but before the journal was reset.
+    shutil.move(path + ".copy", path)
+    _replay(path)
+    assert _user_ids(engine) == [f"user-{i}" for i in range(5)]
+
+
+def test_acknowledged_operations_are_not_replayed(engine, tmp_path):
+    path = str(tmp_path / "journal.log")
+    journal = write_behind.Journal(path)
+    journal.append(_records(3))
+    journal.append([{"ack": ["op-0"]}])
+    journal.close()
+
+    _replay(path)
+    assert _user_ids(engine) == ["user-1", "user-2"]
+
+
+def test_failing_batch_is_kept_and_retried(engine, tmp_path, monkeypatch):
+    queue = write_behind.WriteBehindQueue(
+        write_behind.Journal(str(tmp_path / "journal.log"))
+    )
+    apply = queue._apply
+
+    def fail_once(batch, check_applied):
+        monkeypatch.setattr(queue, "_apply", apply)
+        raise RuntimeError("outside the operations")
+
+    monkeypatch.setattr(queue, "_apply", fail_once)
+    queue.submit("session", _add_user, {"user_id": "retried"}, timeout=5)
+    assert queue.wait_for("session", timeout=5) == (True, [])
+    stats = queue.stats()
+    assert stats["flusher_alive"]
+    assert "RuntimeError" in stats["last_error"]
+    queue.close()
+    assert _user_ids(engine) == ["retried"]
+
+
+def test_failing_operation_is_dropped_alone(engine, tmp_path):
+    queue = write_behind.WriteBehindQueue(
+        write_behind.Journal(str(tmp_path / "journal.log"))
+    )
+    for user_id in ("user-0", "user-0", "user-1"):
+        queue.submit("session", _add_user, {"user_id": user_id}, timeout=5)
+    waited, failures = queue.wait_for("session", timeout=5)
+    queue.close()
+    assert waited
+    assert [f["error"] for f in failures] == ["IntegrityError"]
+    assert _user_ids(engine) == ["user-0", "user-1"]
+
+
+_migrated = {"users": False}
+
+
+@write_behind.operation
+def _add_user_once_migrated(conn: sqlalchemy.engine.base.Connection, user_id: str):
+    if not _migrated["users"]:
+        raise sqlalchemy.exc.ProgrammingError(
+            "INSERT INTO users", {}, Exception('relation "users" does not exist')
+        )
+    _add_user(conn, user_id)
+
+
+def test_schema_error_keeps_the_operation_in_the_journal(engine, tmp_path, monkeypatch):
+    monkeypatch.setitem(_migrated, "users", False)
+    path = str(tmp_path / "journal.log")
+    queue = write_behind.WriteBehindQueue(write_behind.Journal(path))
+    queue.submit("session", _add_user_once_migrated, {"user_id": "kept"}, timeout=5)
+    with pytest.raises(TimeoutError):
+        queue.wait_for("session", timeout=0.5)
+    queue.close(timeout=5)
+    assert _user_ids(engine) == []
+
+    monkeypatch.setitem(_migrated, "users", True)
+    _replay(path)
+    assert _user_ids(engine) == ["kept"]
+
+
+def test_start_replays_journals_of_a_former_worker_count(engine, tmp_path, monkeypatch):
+    path = str(tmp_path / "journal.log")
+    monkeypatch.setattr(write_behind, "JOURNAL_PATH", path)
+    monkeypatch.setattr(write_behind, "ENABLED", True)
+    monkeypatch.setattr(write_behind, "_queue", None)
+    records = _records(4)
+    # Left by one worker, and by the third of three workers.
+    for journal_path, journal_records in (
+        (path, records[:2]),
+        (f"{path}.2", records[2:]),
+    ):
+        journal = write_behind.Journal(journal_path)
+        journal.append(journal_records)
+        journal.close()
+    # Still in use by a live process.
+    in_use = write_behind.Journal(f"{path}.3")
+    in_use.append(_records(5)[4:])
+
+    write_behind.start(slots=2)
+    write_behind.close()
+    in_use.close()
+    assert _user_ids(engine) == [f"user-{i}" for i in range(4)]
+    assert sorted(p.name for p in tmp_path.glob("journal.log*")) == [
+        "journal.log",
+        "journal.log.0",
+        "journal.log.2",
+        "journal.log.3",
+    ]
+
+
+def test_orphaned_journal_is_retried_after_a_transient_error(
+    engine, tmp_path, monkeypatch
+):
+    path = str(tmp_path / "journal.log")
+    monkeypatch.setattr(write_behind, "JOURNAL_PATH", path)
+    monkeypatch.setattr(write_behind, "_journal_slots", 2)
+    journal = write_behind.Journal(f"{path}.5")
+    journal.append(_records(2))
+    journal.close()
+    apply = write_behind.WriteBehindQueue._apply
+    database_down_until = time.monotonic() + 0.5
+
+    def apply_once_up(queue, batch, check_applied):
+        if time.monotonic() < database_down_until:
+            raise sqlalchemy.exc.OperationalError("SELECT", {}, Exception("down"))
+        return apply(queue, batch, check_applied)
+
+    monkeypatch.setattr(write_behind.WriteBehindQueue, "_apply", apply_once_up)
+    monkeypatch.setattr(write_behind.resilience, "breaker", resilience.CircuitBreaker())
+    assert write_behind._replay_orphaned_journals(timeout=0.1) == 1
+    assert _user_ids(engine) == []
+    [queue] = write_behind._orphan_queues
+    assert queue.wait_until_empty(timeout=5)
+    write_behind.close()
+    assert _user_ids(engine) == ["user-0", "user-1"]